@@ -0,0 +1,63 @@
+import argparse
+import time
+
+from util import (Node, StackFrontier, QueueFrontier,
+                  IndexedStackFrontier, IndexedQueueFrontier)
+
+FRONTIERS = [
+    ("StackFrontier", StackFrontier),
+    ("QueueFrontier", QueueFrontier),
+    ("IndexedStackFrontier", IndexedStackFrontier),
+    ("IndexedQueueFrontier", IndexedQueueFrontier)
+]
+
+LEGACY = {StackFrontier, QueueFrontier}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time frontier operations as the frontier grows."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6])
+    parser.add_argument("--ops", type=int, default=1000,
+                        help="operations timed at every size")
+    parser.add_argument("--legacy-max", type=int, default=10 ** 5,
+                        help="largest size to time the list frontiers at")
+    args = parser.parse_args()
+
+    print(f"{'frontier':<22}{'size':>10}{'contains (us)':>16}{'remove (us)':>14}")
+    for size in args.sizes:
+        for label, cls in FRONTIERS:
+            if cls in LEGACY and size > args.legacy_max:
+                continue
+            contains, remove = measure(cls, size, args.ops)
+            print(f"{label:<22}{size:>10}{contains:>16.3f}{remove:>14.3f}")
+
+
+def measure(cls, size, ops):
+    """
+    Fills a frontier of class `cls` with `size` nodes and returns
+    the average cost in microseconds of `contains_state` and `remove`.
+    """
+    frontier = cls()
+    for state in range(size):
+        frontier.add(Node(state=state, parent=None, action=None))
+
+    # Look up states that sit at the far end of a linear scan
+    ops = min(ops, size)
+    start = time.perf_counter()
+    for state in range(size - ops, size):
+        frontier.contains_state(state)
+    contains = (time.perf_counter() - start) / ops * 10 ** 6
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        frontier.remove()
+    remove = (time.perf_counter() - start) / ops * 10 ** 6
+
+    return contains, remove
+
+
+if __name__ == "__main__":
+    main()
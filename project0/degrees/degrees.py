@@ -1,7 +1,20 @@
+import argparse
 import csv
+import json
+import multiprocessing
+import os
+import queue
 import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import Graph, MoviesView, NamesView, PeopleView
+from hubs import load_hubs
+from nameindex import NameIndex
+from snapshot import load_graph, snapshot_key
+from util import Node, IndexedQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +25,39 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact co-star graph behind the dictionaries above, if loaded with it
+graph = None
 
-def load_data(directory):
+# Precomputed BFS trees from hub people of the graph, if loaded
+hub_index = None
+
+# Prefix and fuzzy search over the keys of `names`
+name_index = None
+
+# Number of people expanded by the last search
+num_explored = 0
+
+
+def load_data(directory, backend="dict", cache=True):
     """
     Load data from CSV files into memory.
+
+    The "csr" backend keeps the data in a compact Graph and
+    replaces `names`, `people` and `movies` by read-only views of it.
+    With `cache`, the graph is memory-mapped from a binary snapshot
+    that is rebuilt whenever the CSV files change, and that also holds
+    the trigram index behind name suggestions. Otherwise that index is
+    built on the first name suggestion.
     """
+    global graph, names, people, movies, name_index
+    if backend == "csr":
+        graph = load_graph(directory) if cache else Graph.from_csv(directory)
+        names = NamesView(graph)
+        people = PeopleView(graph)
+        movies = MoviesView(graph)
+        name_index = NameIndex(graph.sorted_names(), graph.name_trigrams)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,17 +92,84 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    name_index = NameIndex(sorted(names))
+
+
+def load_hub_index(directory, count=0, hub_ids=()):
+    """
+    Loads BFS trees from the `count` best connected people and the
+    people in `hub_ids`, computing and saving them if needed.
+    Requires the data to be loaded with the "csr" backend.
+    """
+    global hub_index
+    if graph is None:
+        raise ValueError("hub trees need the csr backend")
+    for person_id in hub_ids:
+        if graph.person_index(person_id) is None:
+            raise ValueError(f"unknown person id: {person_id}")
+    hub_index = load_hubs(directory, graph, snapshot_key(directory),
+                          count=count, hub_ids=hub_ids)
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [directory] [--backend {dict,csr}] "
+              "[--no-cache] [--hubs N] [--hub-ids FILE] "
+              "[--bidirectional] [--compare] "
+              "[--batch FILE [--workers N] [--output FILE]]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--backend", choices=["dict", "csr"], default="dict",
+                        help="keep the data in dictionaries or a CSR graph")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="do not use a snapshot of the CSR graph")
+    parser.add_argument("--hubs", type=int, default=0, metavar="N",
+                        help="precompute BFS trees from the N best "
+                             "connected people (csr backend)")
+    parser.add_argument("--hub-ids", metavar="FILE",
+                        help="also use the person ids in FILE as hubs")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both source and target")
+    parser.add_argument("--compare", action="store_true",
+                        help="report explored people for both searches")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer the name pairs in FILE ('-' for stdin)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of batch worker processes")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write batch results to FILE instead of stdout")
+    args = parser.parse_args()
+    if (args.hubs or args.hub_ids) and args.backend != "csr":
+        parser.error("--hubs and --hub-ids need --backend csr")
+
+    # Keep batch output clean of progress messages
+    log = sys.stderr if args.batch else sys.stdout
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
-    
+    print("Loading data...", file=log)
+    load_data(args.directory, backend=args.backend, cache=not args.no_cache)
+    if args.hubs or args.hub_ids:
+        hub_ids = []
+        if args.hub_ids:
+            with open(args.hub_ids, encoding="utf-8") as f:
+                hub_ids = [line.strip() for line in f if line.strip()]
+        load_hub_index(args.directory, count=args.hubs, hub_ids=hub_ids)
+    print("Data loaded.", file=log)
+
+    if args.batch:
+        if args.batch == "-":
+            queries = sys.stdin
+        else:
+            queries = open(args.batch, encoding="utf-8")
+        if args.output is None:
+            output = sys.stdout
+        else:
+            output = open(args.output, "w", encoding="utf-8")
+        with queries, output:
+            run_batch(queries, output, workers=args.workers,
+                      bidirectional=args.bidirectional)
+        return
+
     source = person_id_for_name(input("Name: "))
     if source is None:
         sys.exit("Person not found.")
@@ -69,7 +177,10 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.compare:
+        compare_searches(source, target)
+
+    path = shortest_path(source, target, bidirectional=args.bidirectional)
 
     if path is None:
         print("Not connected.")
@@ -84,11 +195,218 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def run_batch(queries, output, workers=None, bidirectional=False):
+    """
+    Answers every (source, target) name pair in `queries` and writes
+    one JSON line per pair to `output`, in input order.
+
+    Each line of `queries` is either a JSON object with "source" and
+    "target" names or the two names separated by a tab.
+    Queries are answered by a pool of `workers` processes that share
+    the loaded data. Only a bounded window of queries is in flight at
+    once, so that each result is written as soon as it and every
+    result before it are ready, without waiting for the end of input.
+    """
+    lines = (line for line in queries if line.strip())
+
+    # Forked workers inherit the loaded data instead of reloading it
+    if "fork" in multiprocessing.get_all_start_methods():
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        )
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    answer = partial(answer_query, bidirectional=bidirectional)
+
+    # A thread writes results in input order while this one reads and
+    # submits queries, so results stream out as input arrives, and at
+    # most `size` queries are held in the window at once
+    size = 16 * (workers or os.cpu_count() or 1)
+    window = queue.Queue(maxsize=size)
+    errors = []
+    writer = threading.Thread(target=write_results,
+                              args=(window, output, errors))
+    with pool:
+        try:
+            for line in lines:
+                window.put(pool.submit(answer, line))
+
+                # The first submit forks every worker, so they are
+                # forked before the writer thread runs
+                if writer.ident is None:
+                    writer.start()
+        finally:
+            window.put(None)
+            if writer.ident is not None:
+                writer.join()
+    if errors:
+        raise errors[0]
+
+
+def write_results(window, output, errors):
+    """
+    Writes the result of every future taken from `window` as a JSON
+    line until it takes None, keeping the first error in `errors`.
+    """
+    while True:
+        future = window.get()
+        if future is None:
+            return
+
+        # Keep taking futures after an error so that the reader
+        # never blocks on a full window
+        if errors:
+            continue
+        try:
+            output.write(json.dumps(future.result()) + "\n")
+            output.flush()
+        except Exception as e:
+            errors.append(e)
+
+
+def parse_query(line):
+    """
+    Returns the (source, target) names of a batch query line.
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            query = json.loads(line)
+            return query["source"], query["target"]
+        except (ValueError, KeyError, TypeError):
+            raise ValueError(f"invalid query: {line}")
+    if line.count("\t") != 1:
+        raise ValueError(f"invalid query: {line}")
+    source, target = line.split("\t")
+    return source.strip(), target.strip()
+
+
+def answer_query(line, bidirectional=False):
+    """
+    Returns the JSON-ready result of a batch query line,
+    with its latency in milliseconds.
+
+    A name shared by several people resolves to the one who starred
+    in the most movies, and "ambiguous" then maps "source" or "target"
+    to the ids of everyone with that name, in the order tried.
+    """
+    start = time.perf_counter()
+    try:
+        source_name, target_name = parse_query(line)
+    except ValueError as e:
+        return {"error": str(e), "latency_ms": 0.0}
+    result = {"source": source_name, "target": target_name}
+
+    sources, error = resolve_name(source_name)
+    targets = []
+    if error is None:
+        targets, error = resolve_name(target_name)
+
+    ambiguous = {}
+    if len(sources) > 1:
+        ambiguous["source"] = sources
+    if len(targets) > 1:
+        ambiguous["target"] = targets
+    if ambiguous:
+        result["ambiguous"] = ambiguous
+
+    if error is not None:
+        result["error"] = error
+    elif sources[0] == targets[0]:
+        result["degrees"] = 0
+        result["path"] = []
+    else:
+        path = shortest_path(sources[0], targets[0],
+                             bidirectional=bidirectional)
+        result["degrees"] = None if path is None else len(path)
+        result["path"] = None if path is None else [list(step) for step in path]
+
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def resolve_name(name):
+    """
+    Returns (person_ids, None) for the people with a given name,
+    the one who starred in the most movies first, or ([], error
+    message) if no one has that name.
+    """
+    person_ids = candidates_for_name(name)
+    if len(person_ids) == 0:
+        return [], f"person not found: {name}"
+    return person_ids, None
+
+
+def shortest_path(source, target, bidirectional=False, hubs=True):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If no possible path, or either person id is unknown, returns None.
+    If `bidirectional` is True, searches from both ends at once.
+    If `hubs` is False, searches without the hub trees even if loaded.
+    """
+    search = bidirectional_path if bidirectional else breadth_first_path
+
+    # Search the compact graph by index when it is loaded
+    if graph is not None:
+        source, target = graph.person_index(source), graph.person_index(target)
+        if source is None or target is None:
+            return None
+        if hubs and hub_index is not None:
+            path = hub_path(source, target)
+        else:
+            path = search(source, target, graph.neighbors)
+        return None if path is None else graph.path_ids(path)
+
+    if source not in people or target not in people:
+        return None
+    return search(source, target, neighbors_for_person)
+
+
+def hub_path(source, target):
+    """
+    Returns the shortest (movie, person) index path between two people,
+    reading it from the hub trees when either person is a hub and
+    otherwise bounding a bidirectional search by the best path
+    through a hub.
+
+    If no possible path, returns None.
+    """
+    global num_explored
+    num_explored = 0
+
+    # Paths from or to a hub are read straight from its tree
+    if hub_index.is_hub(source):
+        return hub_index.path_from_hub(source, target)
+    if hub_index.is_hub(target):
+        return hub_index.path_to_hub(target, source)
+
+    # A hub that reaches only one of the two proves there is no path
+    if hub_index.separates(source, target):
+        return None
+    bounds = hub_index.bounds(source, target)
+    if bounds is None:
+        return bidirectional_path(source, target, graph.neighbors)
+
+    # Only search for paths shorter than the one through the hub
+    lower, upper, hub = bounds
+    if lower < upper:
+        path = bidirectional_path(source, target, graph.neighbors,
+                                  max_depth=upper - 1)
+        if path is not None:
+            return path
+    return (hub_index.path_to_hub(hub, source)
+            + hub_index.path_from_hub(hub, target))
+
+
+def breadth_first_path(source, target, neighbors):
+    """
+    Returns the shortest list of (action, state) pairs that connect
+    the source to the target, searching breadth first from the source.
+    `neighbors` returns the (action, state) pairs next to a state.
+
     If no possible path, returns None.
     """
 
@@ -111,6 +429,8 @@ def shortest_path(source, target):
                 return solution
         - add node to explored set
     """
+    global num_explored
+
     # Ensure source and target are not the same person
     if source == target:
         sys.exit("It's the same person.")
@@ -122,11 +442,12 @@ def shortest_path(source, target):
     start = Node(state=source, parent=None, action=None)
     
     # Initialize frontier with a starting node
-    frontier = QueueFrontier()
+    frontier = IndexedQueueFrontier()
     frontier.add(start)
 
     # Initialize explored set
     explored = set()
+    num_explored = 0
 
     # Loop until solution is found
     while True:
@@ -137,9 +458,10 @@ def shortest_path(source, target):
 
         # Remove node
         node = frontier.remove()
+        num_explored += 1
 
         # Add neighbors to frontier
-        for action, state in neighbors_for_person(node.state):
+        for action, state in neighbors(node.state):
             if not frontier.contains_state(state) and state not in explored:
                 child = Node(state=state, parent=node, action=action)
                 frontier.add(child)
@@ -157,13 +479,122 @@ def shortest_path(source, target):
         # Mark node as explored
         explored.add(node.state)
 
+
+def bidirectional_path(source, target, neighbors, max_depth=None):
+    """
+    Returns the shortest list of (action, state) pairs that connect
+    the source to the target, growing one frontier from the source
+    and one from the target until they meet.
+    `neighbors` returns the (action, state) pairs next to a state.
+
+    If no possible path, or none of at most `max_depth` steps, returns None.
+    """
+    global num_explored
+
+    # Ensure source and target are not the same person
+    if source == target:
+        sys.exit("It's the same person.")
+
+    # Map every reached person to the (movie_id, person_id) step
+    # that leads one person closer to the side it was reached from
+    forward = {source: None}
+    backward = {target: None}
+
+    # Frontiers hold the people reached at the current depth of each side
+    forward_frontier = [source]
+    backward_frontier = [target]
+    num_explored = 0
+
+    # Number of levels expanded on both sides so far
+    depth = 0
+
+    while forward_frontier and backward_frontier:
+
+        # Any path found from here on is longer than allowed
+        if max_depth is not None and depth >= max_depth:
+            return None
+        depth += 1
+
+        # Expand the smaller frontier by one whole level
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, others = forward_frontier, forward, backward
+        else:
+            frontier, parents, others = backward_frontier, backward, forward
+
+        next_frontier = []
+        meeting = None
+        for person_id in frontier:
+            num_explored += 1
+            for movie_id, neighbor in neighbors(person_id):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie_id, person_id)
+                next_frontier.append(neighbor)
+
+                # Every meeting found in this level has the same length
+                if neighbor in others:
+                    meeting = neighbor
+                    break
+            if meeting is not None:
+                break
+
+        if meeting is not None:
+            return join_paths(forward, backward, meeting)
+
+        if frontier is forward_frontier:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    # One side ran out of people, so there is no path
+    return None
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Builds the (movie_id, person_id) path through `meeting`
+    from the parent maps of a bidirectional search.
+    """
+    # Walk back from the meeting person to the source
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    # Walk on from the meeting person to the target
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, person_id = backward[person_id]
+        path.append((movie_id, person_id))
+    return path
+
+
+def compare_searches(source, target):
+    """
+    Prints how many people the single-ended and the bidirectional
+    searches expand to connect the source to the target.
+    Both search the graph itself, without any hub trees.
+    """
+    for label, bidirectional in (("BFS", False), ("Bidirectional", True)):
+        path = shortest_path(source, target, bidirectional=bidirectional,
+                             hubs=False)
+        degrees = "not connected" if path is None else f"{len(path)} degrees"
+        print(f"{label}: {num_explored} people explored, {degrees}.")
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = candidates_for_name(name)
     if len(person_ids) == 0:
+        suggestions = suggest_names(name, limit=5)
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
@@ -183,11 +614,54 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def candidates_for_name(name):
+    """
+    Returns the IMDB ids of the people with a given name,
+    most movies first, without asking which person was meant.
+    """
+    return sorted(names.get(name.lower(), set()),
+                  key=lambda person_id: (-movie_count(person_id), person_id))
+
+
+def movie_count(person_id):
+    """
+    Returns the number of movies a person starred in.
+    """
+    if graph is not None:
+        person = graph.person_index(person_id)
+        if person is None:
+            return 0
+        return graph.person_offsets[person + 1] - graph.person_offsets[person]
+    return len(people[person_id]["movies"])
+
+
+def complete_name(prefix, limit=10):
+    """
+    Returns up to `limit` lowercase names starting with `prefix`.
+    """
+    return name_index.complete(prefix, limit=limit)
+
+
+def suggest_names(name, limit=10):
+    """
+    Returns up to `limit` lowercase names close to a misspelled name.
+    """
+    return name_index.fuzzy(name, limit=limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        person = graph.person_index(person_id)
+        if person is None:
+            return set()
+        return set(graph.path_ids(graph.neighbors(person)))
+
+    if person_id not in people:
+        return set()
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
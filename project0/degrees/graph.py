@@ -0,0 +1,309 @@
+import csv
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+class Graph():
+    """
+    Compact co-star graph.
+
+    People and movies are numbered by dense integer indexes in the
+    order of their IMDb ids, which are kept as the strings of the CSV
+    files: `person_ids[p]` is the id of person `p`, and bisecting the
+    sorted ids finds the index of an id. Edges are stored as CSR arrays:
+    the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`
+    and the stars of movie `m` are
+    `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_stars, name_order,
+                 name_trigrams=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # Person indexes sorted by lowercase name
+        self.name_order = name_order
+
+        # Trigram postings of the names in that order, if saved with
+        # the graph
+        self.name_trigrams = name_trigrams
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds a graph from the CSV files in `directory`.
+        """
+        # Load people, ordered by id
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            rows = sorted(
+                (row["id"], row["name"], to_year(row["birth"]))
+                for row in csv.DictReader(f)
+            )
+        person_ids = [row[0] for row in rows]
+        person_names = [row[1] for row in rows]
+        person_births = array("H", (row[2] for row in rows))
+
+        # Load movies, ordered by id
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            rows = sorted(
+                (row["id"], row["title"], to_year(row["year"]))
+                for row in csv.DictReader(f)
+            )
+        movie_ids = [row[0] for row in rows]
+        movie_titles = [row[1] for row in rows]
+        movie_years = array("H", (row[2] for row in rows))
+        del rows
+
+        # Load stars as parallel arrays of (person, movie) indexes
+        people = {person_id: i for i, person_id in enumerate(person_ids)}
+        movies = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        star_people = array("i")
+        star_movies = array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    person = people[row["person_id"]]
+                    movie = movies[row["movie_id"]]
+                except KeyError:
+                    continue
+                star_people.append(person)
+                star_movies.append(movie)
+        del people, movies
+
+        person_offsets, person_movies = compress(
+            star_people, star_movies, len(person_ids)
+        )
+        movie_offsets, movie_stars = compress(
+            star_movies, star_people, len(movie_ids)
+        )
+        name_order = array("i", sorted(
+            range(len(person_names)), key=lambda i: person_names[i].lower()
+        ))
+
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   person_offsets, person_movies,
+                   movie_offsets, movie_stars, name_order)
+
+    def person_index(self, person_id):
+        """
+        Returns the index of the person with IMDb id `person_id`, or None.
+        """
+        return find(self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of the movie with IMDb id `movie_id`, or None.
+        """
+        return find(self.movie_ids, movie_id)
+
+    def people_named(self, name):
+        """
+        Returns the indexes of the people whose lowercase name is `name`.
+        """
+        name = name.lower()
+        order = self.name_order
+        i = bisect_left(order, name,
+                        key=lambda person: self.person_names[person].lower())
+        people = []
+        while i < len(order) and self.person_names[order[i]].lower() == name:
+            people.append(order[i])
+            i += 1
+        return people
+
+    def sorted_names(self):
+        """
+        Returns the lowercase names of all people in sorted order.
+        """
+        return SortedNames(self)
+
+    def movies_for(self, person):
+        """
+        Returns the indexes of the movies a person starred in.
+        """
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_for(self, movie):
+        """
+        Returns the indexes of the people who starred in a movie.
+        """
+        offsets = self.movie_offsets
+        return self.movie_stars[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def path_ids(self, path):
+        """
+        Converts a path of (movie, person) indexes
+        into (movie_id, person_id) pairs.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+
+class PeopleView(Mapping):
+    """
+    Read-only `people` dictionary backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": from_year(graph.person_births[person]),
+            "movies": {graph.movie_ids[movie]
+                       for movie in graph.movies_for(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only `movies` dictionary backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": from_year(graph.movie_years[movie]),
+            "stars": {graph.person_ids[person]
+                      for person in graph.stars_for(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only `names` dictionary backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        graph = self.graph
+        people = graph.people_named(name) if name == name.lower() else []
+        if not people:
+            raise KeyError(name)
+        return {graph.person_ids[person] for person in people}
+
+    def __iter__(self):
+        graph = self.graph
+        previous = None
+        for person in graph.name_order:
+            name = graph.person_names[person].lower()
+            if name != previous:
+                yield name
+            previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class SortedNames():
+    """
+    Read-only sequence of the lowercase names of a Graph
+    in sorted order, with one entry per person.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, i):
+        graph = self.graph
+        return graph.person_names[graph.name_order[i]].lower()
+
+    def __len__(self):
+        return len(self.graph.name_order)
+
+
+def compress(keys, values, size):
+    """
+    Groups `values` by their parallel `keys` in [0, size) and returns
+    the CSR (offsets, edges) arrays.
+    """
+    offsets = array("i", [0]) * (size + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    edges = array("i", [0]) * len(values)
+    fill = offsets[:-1]
+    for key, value in zip(keys, values):
+        edges[fill[key]] = value
+        fill[key] += 1
+    return offsets, edges
+
+
+def find(ids, id):
+    """
+    Returns the position of IMDb id `id` in the sorted `ids`, or None.
+    """
+    if not isinstance(id, str):
+        return None
+    i = bisect_left(ids, id)
+    if i < len(ids) and ids[i] == id:
+        return i
+    return None
+
+
+def to_year(year):
+    """
+    Converts a year column to an integer, with 0 for a missing year.
+    """
+    return int(year) if year.isdigit() else 0
+
+
+def from_year(year):
+    """
+    Converts a stored year back to its CSV text.
+    """
+    return str(year) if year else ""
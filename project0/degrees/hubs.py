@@ -0,0 +1,250 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections import deque
+
+from snapshot import align
+
+# Bump whenever the layout of a hubs file changes
+HUBS_VERSION = 3
+
+MAGIC = b"DEGHUBS\0"
+HUBS_NAME = "degrees.hubs"
+
+# Distance of people a hub cannot reach, which no real distance can be
+UNREACHED = -1
+
+
+class HubIndex():
+    """
+    Single-source BFS trees from a set of hub people of a Graph.
+
+    For every hub `h`, `distances[h][p]` is the number of degrees
+    between `h` and person `p`, and `parents[h][p]` and `movies[h][p]`
+    are the next person and the movie on a shortest path from `p`
+    back to `h`.
+    """
+
+    def __init__(self, distances, parents, movies):
+        self.distances = distances
+        self.parents = parents
+        self.movies = movies
+
+    @classmethod
+    def build(cls, graph, hubs):
+        """
+        Runs a BFS on `graph` from every person index in `hubs`.
+        """
+        distances, parents, movies = {}, {}, {}
+        for hub in hubs:
+            distances[hub], parents[hub], movies[hub] = bfs_tree(graph, hub)
+        return cls(distances, parents, movies)
+
+    def hubs(self):
+        return list(self.distances)
+
+    def is_hub(self, person):
+        return person in self.distances
+
+    def distance(self, hub, person):
+        """
+        Returns the degrees between a hub and a person, or None.
+        """
+        distance = self.distances[hub][person]
+        return None if distance == UNREACHED else distance
+
+    def path_to_hub(self, hub, person):
+        """
+        Returns the (movie, person) path from a person to a hub, or None.
+        """
+        if self.distance(hub, person) is None:
+            return None
+        parents, movies = self.parents[hub], self.movies[hub]
+        path = []
+        while person != hub:
+            path.append((movies[person], parents[person]))
+            person = parents[person]
+        return path
+
+    def path_from_hub(self, hub, person):
+        """
+        Returns the (movie, person) path from a hub to a person, or None.
+        """
+        if self.distance(hub, person) is None:
+            return None
+        parents, movies = self.parents[hub], self.movies[hub]
+        path = []
+        while person != hub:
+            path.append((movies[person], person))
+            person = parents[person]
+        path.reverse()
+        return path
+
+    def separates(self, source, target):
+        """
+        Returns True if some hub reaches exactly one of two people,
+        which means the two are not connected.
+        """
+        for hub in self.distances:
+            if ((self.distance(hub, source) is None)
+                    != (self.distance(hub, target) is None)):
+                return True
+        return False
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper, hub) bounds on the degrees between two
+        people from the triangle inequality through every hub, where
+        `hub` gives the upper bound. Returns None if no hub reaches both.
+        """
+        best = None
+        for hub in self.distances:
+            to_source = self.distance(hub, source)
+            to_target = self.distance(hub, target)
+            if to_source is None or to_target is None:
+                continue
+            lower = abs(to_source - to_target)
+            upper = to_source + to_target
+            if best is None:
+                best = [lower, upper, hub]
+            else:
+                best[0] = max(best[0], lower)
+                if upper < best[1]:
+                    best[1], best[2] = upper, hub
+        return None if best is None else tuple(best)
+
+    def save(self, path, key, request):
+        """
+        Saves the hub trees to `path`, tagged with the snapshot `key`
+        of the data they were computed from and the `request` that
+        chose the hubs.
+        """
+        hubs = self.hubs()
+        header = json.dumps({
+            "version": HUBS_VERSION, "key": key, "request": request,
+            "hubs": hubs
+        }).encode("utf-8")
+        start = align(len(MAGIC) + 4 + len(header))
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                f.seek(start)
+                for hub in hubs:
+                    for data in (self.distances[hub], self.parents[hub],
+                                 self.movies[hub]):
+                        f.write(data.tobytes())
+                        f.seek(align(f.tell()))
+                f.truncate(f.tell())
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    @classmethod
+    def load(cls, path, key, size, request):
+        """
+        Returns the hub trees saved at `path`, memory-mapped,
+        for a graph of `size` people.
+
+        Raises ValueError if the file was computed from other data
+        or for another `request`.
+        """
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(data)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError("not a hubs file")
+        length, = struct.unpack("<I", view[len(MAGIC):len(MAGIC) + 4])
+        end = len(MAGIC) + 4 + length
+        header = json.loads(str(view[len(MAGIC) + 4:end], "utf-8"))
+        if header["version"] != HUBS_VERSION or header["key"] != key:
+            raise ValueError("stale hubs file")
+        if header["request"] != request:
+            raise ValueError("hubs file for other hubs")
+
+        position = align(end)
+        distances, parents, movies = {}, {}, {}
+        for hub in header["hubs"]:
+            arrays = []
+            for typecode in ("i", "i", "i"):
+                nbytes = size * array(typecode).itemsize
+                if position + nbytes > len(view):
+                    raise ValueError("truncated hubs file")
+                arrays.append(view[position:position + nbytes].cast(typecode))
+                position = align(position + nbytes)
+            distances[hub], parents[hub], movies[hub] = arrays
+        return cls(distances, parents, movies)
+
+
+def load_hubs(directory, graph, key, count=0, hub_ids=()):
+    """
+    Returns the HubIndex for `graph` saved in `directory`, or computes
+    and saves one if the saved one is missing, stale or was asked for
+    with another `count` or `hub_ids`.
+
+    The hubs are the `count` people with the most co-stars and the
+    people with ids in `hub_ids`. People are only ranked when the
+    index has to be computed.
+    """
+    path = os.path.join(directory, HUBS_NAME)
+    size = len(graph.person_ids)
+    request = {"count": count, "hub_ids": sorted(set(hub_ids))}
+    try:
+        return HubIndex.load(path, key, size, request)
+    except (OSError, ValueError, KeyError, struct.error):
+        pass
+
+    hubs = set(select_hubs(graph, count))
+    hubs.update(graph.person_index(person_id)
+                for person_id in request["hub_ids"])
+    index = HubIndex.build(graph, sorted(hubs))
+    try:
+        index.save(path, key, request)
+    except OSError:
+        return index
+    return HubIndex.load(path, key, size, request)
+
+
+def select_hubs(graph, count):
+    """
+    Returns the indexes of the `count` people with the most co-stars,
+    counting a co-star once per shared movie.
+    """
+    offsets = graph.movie_offsets
+
+    def costars(person):
+        return sum(offsets[movie + 1] - offsets[movie] - 1
+                   for movie in graph.movies_for(person))
+
+    people = range(len(graph.person_ids))
+    return sorted(people, key=costars, reverse=True)[:count]
+
+
+def bfs_tree(graph, hub):
+    """
+    Returns the (distances, parents, movies) arrays of a BFS on `graph`
+    from person index `hub`.
+    """
+    size = len(graph.person_ids)
+    distances = array("i", [UNREACHED]) * size
+    parents = array("i", [-1]) * size
+    movies = array("i", [-1]) * size
+
+    distances[hub] = 0
+    queue = deque([hub])
+    while queue:
+        person = queue.popleft()
+        distance = distances[person] + 1
+        for movie, neighbor in graph.neighbors(person):
+            if distances[neighbor] == UNREACHED:
+                distances[neighbor] = distance
+                parents[neighbor] = person
+                movies[neighbor] = movie
+                queue.append(neighbor)
+    return distances, parents, movies
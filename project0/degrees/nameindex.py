@@ -0,0 +1,139 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+
+class NameIndex():
+    """
+    Prefix and typo-tolerant search over a sorted sequence of
+    lowercase names, which may contain repeats.
+
+    Prefix search bisects the sequence directly. Fuzzy search uses a
+    trigram index mapping every trigram to the positions of the names
+    that contain it, as index_trigrams does. A prebuilt index can be
+    passed as `trigrams`, such as the one saved in a graph snapshot.
+    Otherwise it is built on the first fuzzy search, which takes
+    seconds for a million names, so that loads that never search
+    fuzzily do not pay for it.
+    """
+
+    def __init__(self, names, trigrams=None):
+        self.names = names
+        self.trigrams = trigrams
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to `limit` distinct names that start with `prefix`.
+        """
+        prefix = prefix.lower()
+        names = self.names
+        i = bisect_left(names, prefix)
+        matches = []
+        while i < len(names) and len(matches) < limit:
+            name = names[i]
+            if not name.startswith(prefix):
+                break
+            if not matches or matches[-1] != name:
+                matches.append(name)
+            i += 1
+        return matches
+
+    def fuzzy(self, name, limit=10, typos=1, threshold=0.5):
+        """
+        Returns up to `limit` names similar to `name`, most similar first.
+
+        Names of a length within `typos` of the length of `name` that
+        share enough trigrams to be within `typos` edits are considered,
+        and names are ranked by the Dice coefficient of their trigrams,
+        keeping those scoring at least `threshold`.
+        """
+        if self.trigrams is None:
+            self.trigrams = index_trigrams(self.names)
+        wanted = trigrams(name.lower())
+
+        # An edit breaks at most 3 trigrams, so every name within `typos`
+        # edits shares at least `shared` of the rarest 3 * typos + `shared`
+        # query trigrams
+        shared = min(3, max(1, len(wanted) - 3 * typos))
+        empty = array("i")
+        postings = sorted(
+            (self.trigrams.get(trigram, empty) for trigram in wanted), key=len
+        )
+        counts = Counter()
+        for posting in postings[:3 * typos + shared]:
+            counts.update(posting)
+
+        scored = []
+        for position, count in counts.items():
+            if count < shared:
+                continue
+            found = self.names[position]
+            if abs(len(found) - len(name)) > typos:
+                continue
+            found = trigrams(found)
+            score = 2 * len(wanted & found) / (len(wanted) + len(found))
+            if score >= threshold:
+                scored.append((-score, self.names[position]))
+        scored.sort()
+        return [name for _, name in scored[:limit]]
+
+
+def index_trigrams(names):
+    """
+    Maps every trigram to an array of the positions of the
+    distinct names in `names` that contain it.
+    """
+    postings = {}
+    previous = None
+    for position in range(len(names)):
+        name = names[position]
+        if name == previous:
+            continue
+        previous = name
+        for trigram in trigrams(name):
+            postings.setdefault(trigram, []).append(position)
+    return {trigram: array("i", positions)
+            for trigram, positions in postings.items()}
+
+
+class TrigramTable():
+    """
+    Read-only mapping of trigrams to the positions of the names that
+    contain them, stored as a sorted sequence of the trigrams and
+    CSR arrays of positions: the positions of the i-th trigram are
+    `positions[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, keys, offsets, positions):
+        self.keys = keys
+        self.offsets = offsets
+        self.positions = positions
+
+    def get(self, trigram, default=None):
+        keys = self.keys
+        i = bisect_left(keys, trigram)
+        if i == len(keys) or keys[i] != trigram:
+            return default
+        return self.positions[self.offsets[i]:self.offsets[i + 1]]
+
+
+def flatten_trigrams(postings):
+    """
+    Returns the sorted trigrams, offsets and positions of a TrigramTable
+    holding the same postings as a dict made by index_trigrams.
+    """
+    keys = sorted(postings)
+    offsets = array("q", [0])
+    positions = array("i")
+    for trigram in keys:
+        positions.extend(postings[trigram])
+        offsets.append(len(positions))
+    return keys, offsets, positions
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams of a name padded with spaces.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,193 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph
+from nameindex import TrigramTable, flatten_trigrams, index_trigrams
+
+# Bump whenever the layout of a snapshot file changes
+SNAPSHOT_VERSION = 3
+
+MAGIC = b"DEGREES\0"
+SNAPSHOT_NAME = "degrees.snapshot"
+CSV_FILES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Graph arrays saved in a snapshot, with their array typecodes
+ARRAYS = [
+    ("person_births", "H"),
+    ("movie_years", "H"),
+    ("person_offsets", "i"),
+    ("person_movies", "i"),
+    ("movie_offsets", "i"),
+    ("movie_stars", "i"),
+    ("name_order", "i")
+]
+
+# Graph string lists saved in a snapshot
+STRINGS = ["person_ids", "person_names", "movie_ids", "movie_titles"]
+
+
+class StringTable():
+    """
+    Read-only list of strings stored as one UTF-8 blob
+    and an array of offsets into it.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+def load_graph(directory):
+    """
+    Returns the Graph for the CSV files in `directory`, memory-mapped
+    from its snapshot. Builds and saves the snapshot first if it is
+    missing or older than the CSV files.
+    """
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    key = snapshot_key(directory)
+    try:
+        return read_snapshot(path, key)
+    except (OSError, ValueError, KeyError, struct.error):
+        pass
+
+    graph = Graph.from_csv(directory)
+    try:
+        write_snapshot(path, key, graph)
+    except OSError:
+        # Read-only data directories just go without a cache
+        return graph
+    return read_snapshot(path, key)
+
+
+def snapshot_key(directory):
+    """
+    Returns what a snapshot must match to be up to date:
+    the layout version and the size and mtime of every CSV file.
+    """
+    files = {}
+    for name in CSV_FILES:
+        stat = os.stat(os.path.join(directory, name))
+        files[name] = [stat.st_size, stat.st_mtime_ns]
+    return {
+        "version": SNAPSHOT_VERSION,
+        "byteorder": sys.byteorder,
+        "files": files
+    }
+
+
+def write_snapshot(path, key, graph):
+    """
+    Saves `graph` to a snapshot file at `path`.
+
+    The file holds the magic bytes, the length of a JSON header,
+    the header itself, and then every section aligned to 8 bytes.
+    """
+    sections = []
+    for name, typecode in ARRAYS:
+        sections.append((name, typecode, getattr(graph, name)))
+    for name in STRINGS:
+        sections.extend(string_sections(name, getattr(graph, name)))
+
+    # Save the trigram index of the names too, so that loading the
+    # snapshot does not rebuild it
+    keys, offsets, positions = flatten_trigrams(
+        index_trigrams(graph.sorted_names())
+    )
+    sections.append(("trigram_offsets", "q", offsets))
+    sections.append(("trigram_positions", "i", positions))
+    sections.extend(string_sections("trigram_keys", keys))
+
+    # Lay sections out after a header of known length
+    layout = {}
+    position = 0
+    for name, typecode, data in sections:
+        size = len(data) * (array(typecode).itemsize if typecode != "B" else 1)
+        layout[name] = [typecode, position, size]
+        position = align(position + size)
+    header = json.dumps({"key": key, "sections": layout}).encode("utf-8")
+    start = align(len(MAGIC) + 4 + len(header))
+
+    # Write to a temporary file so readers never see a partial snapshot
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for name, typecode, data in sections:
+                f.seek(start + layout[name][1])
+                f.write(data if typecode == "B" else data.tobytes())
+            f.truncate(start + position)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def read_snapshot(path, key):
+    """
+    Returns the Graph stored in the snapshot at `path`,
+    backed by a read-only memory map of the file.
+
+    Raises ValueError if the snapshot does not match `key`.
+    """
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(data)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError("not a degrees snapshot")
+    length, = struct.unpack("<I", view[len(MAGIC):len(MAGIC) + 4])
+    end = len(MAGIC) + 4 + length
+    header = json.loads(str(view[len(MAGIC) + 4:end], "utf-8"))
+    if header["key"] != key:
+        raise ValueError("stale snapshot")
+    start = align(end)
+
+    sections = {}
+    for name, (typecode, position, size) in header["sections"].items():
+        if start + position + size > len(view):
+            raise ValueError("truncated snapshot")
+        section = view[start + position:start + position + size]
+        sections[name] = section if typecode == "B" else section.cast(typecode)
+
+    fields = {name: sections[name] for name, _ in ARRAYS}
+    for name in STRINGS:
+        fields[name] = StringTable(sections[f"{name}.blob"],
+                                   sections[f"{name}.offsets"])
+    fields["name_trigrams"] = TrigramTable(
+        StringTable(sections["trigram_keys.blob"],
+                    sections["trigram_keys.offsets"]),
+        sections["trigram_offsets"], sections["trigram_positions"]
+    )
+    return Graph(**fields)
+
+
+def string_sections(name, strings):
+    """
+    Returns the offsets and blob sections of a StringTable of `strings`.
+    """
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("q", [0])
+    for s in encoded:
+        offsets.append(offsets[-1] + len(s))
+    return [(f"{name}.offsets", "q", offsets),
+            (f"{name}.blob", "B", b"".join(encoded))]
+
+
+def align(position):
+    """
+    Rounds `position` up to a multiple of 8 bytes.
+    """
+    return (position + 7) // 8 * 8
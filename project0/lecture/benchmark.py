@@ -0,0 +1,117 @@
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from generate import KINDS, generate
+from maze import STRATEGIES, GridMaze, Maze
+
+FIELDS = ["kind", "size", "step", "explored", "solution_length",
+          "wall_time_s", "peak_memory_bytes"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time maze parsing and every solve strategy "
+                    "on generated mazes and write the results as CSV."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[50, 100, 500, 1000])
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS)
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES,
+                        default=STRATEGIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the traced runs that measure peak memory")
+    parser.add_argument("--grid", action="store_true",
+                        help="use the compact GridMaze representation")
+    parser.add_argument("--output", help="CSV file (default: stdout)")
+    args = parser.parse_args()
+    cls = GridMaze if args.grid else Maze
+
+    if args.output is None:
+        output = sys.stdout
+    else:
+        output = open(args.output, "w", newline="")
+    writer = csv.DictWriter(output, fieldnames=FIELDS)
+    writer.writeheader()
+    for size in args.sizes:
+        for kind in args.kinds:
+            for row in run(cls, kind, size, args.strategies, args.seed,
+                           memory=not args.no_memory):
+                writer.writerow(row)
+                output.flush()
+    if output is not sys.stdout:
+        output.close()
+
+
+def run(cls, kind, size, strategies, seed, memory=True):
+    """
+    Generates a `size` x `size` maze of a given kind and yields a
+    result row for parsing it as a `cls` maze and for solving it
+    with every strategy.
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write(generate(kind, size, size, seed=seed))
+    try:
+        maze, elapsed = timed(lambda: cls(f.name))
+        yield {
+            "kind": kind, "size": size, "step": "parse",
+            "wall_time_s": elapsed,
+            "peak_memory_bytes": peak(lambda: cls(f.name)) if memory else ""
+        }
+
+        for strategy in strategies:
+            _, elapsed = timed(lambda: solve(maze, strategy))
+            row = {
+                "kind": kind, "size": size, "step": strategy,
+                "explored": maze.num_explored,
+                "solution_length": (len(maze.solution[1])
+                                    if maze.solution is not None else ""),
+                "wall_time_s": elapsed,
+                "peak_memory_bytes": ""
+            }
+            if memory:
+                row["peak_memory_bytes"] = peak(lambda: solve(maze, strategy))
+            yield row
+    finally:
+        os.remove(f.name)
+
+
+def solve(maze, strategy):
+    """
+    Solves a maze with a strategy, leaving no solution if there is none.
+    """
+    maze.solution = None
+    try:
+        maze.solve(strategy)
+    except Exception:
+        pass
+
+
+def timed(function):
+    """
+    Returns the result of calling `function` and the seconds it took.
+    """
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def peak(function):
+    """
+    Returns the peak bytes allocated while calling `function`.
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import random
+
+KINDS = ["perfect", "rooms", "random"]
+
+WALL = ord("#")
+OPEN = ord(" ")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a maze in the text format read by maze.py."
+    )
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("height", type=int)
+    parser.add_argument("width", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--density", type=float, default=0.3,
+                        help="share of wall cells in random mazes")
+    args = parser.parse_args()
+
+    text = generate(args.kind, args.height, args.width,
+                    seed=args.seed, density=args.density)
+    with open(args.output, "w") as f:
+        f.write(text)
+
+
+def generate(kind, height, width, seed=None, density=0.3):
+    """
+    Returns the text of a `height` x `width` maze of a given kind,
+    with the start in the top left and the goal in the bottom right.
+    Perfect mazes only carve cells at even coordinates, so along an
+    even-sized side their goal is one row or column in from the edge,
+    and they need at least 3 cells along one side:
+
+    "perfect": corridors with exactly one path between any two cells,
+    "rooms": open rooms joined by doorways,
+    "random": cells that are walls with probability `density`,
+    with one random path kept clear so that the maze is solvable.
+    """
+    if height < 2 or width < 2:
+        raise ValueError("maze must be at least 2 x 2")
+    if kind == "perfect" and max(height, width) < 3:
+        raise ValueError("perfect maze must be at least 3 cells across")
+    rng = random.Random(seed)
+    if kind == "perfect":
+        grid = perfect(height, width, rng)
+    elif kind == "rooms":
+        grid = rooms(height, width, rng)
+    elif kind == "random":
+        grid = scattered(height, width, rng, density)
+    else:
+        raise ValueError(f"unknown maze kind: {kind}")
+
+    # Perfect mazes only carve cells at even coordinates
+    goal = ((height - 1) // 2 * 2, (width - 1) // 2 * 2)
+    if kind != "perfect":
+        goal = (height - 1, width - 1)
+    grid[0][0] = ord("A")
+    grid[goal[0]][goal[1]] = ord("B")
+    return "\n".join(row.decode() for row in grid) + "\n"
+
+
+def perfect(height, width, rng):
+    """
+    Returns grid rows of a perfect maze carved by a randomized
+    depth-first search over the cells at even coordinates.
+    """
+    grid = [bytearray([WALL]) * width for _ in range(height)]
+    grid[0][0] = OPEN
+    stack = [(0, 0)]
+    while stack:
+        i, j = stack[-1]
+        options = []
+        for di, dj in ((-2, 0), (2, 0), (0, -2), (0, 2)):
+            r, c = i + di, j + dj
+            if 0 <= r < height and 0 <= c < width and grid[r][c] == WALL:
+                options.append((r, c))
+        if not options:
+            stack.pop()
+            continue
+
+        # Knock down the wall between the cell and a random unvisited one
+        r, c = rng.choice(options)
+        grid[(i + r) // 2][(j + c) // 2] = OPEN
+        grid[r][c] = OPEN
+        stack.append((r, c))
+    return grid
+
+
+def rooms(height, width, rng):
+    """
+    Returns grid rows of open rooms, made by recursively splitting
+    the maze with walls that each keep one doorway.
+    Walls sit on odd coordinates and doorways on even ones,
+    so no wall ever blocks an earlier doorway.
+    """
+    grid = [bytearray([OPEN]) * width for _ in range(height)]
+    stack = [(0, 0, height, width)]
+    while stack:
+        top, left, bottom, right = stack.pop()
+
+        # Rooms start on even coordinates, so these are the odd
+        # coordinates that leave rooms at least 3 cells across
+        rows = range(top + 3, bottom - 3, 2)
+        cols = range(left + 3, right - 3, 2)
+        if not rows and not cols:
+            continue
+
+        # Split across the longer side
+        if rows and (bottom - top >= right - left or not cols):
+            i = rng.choice(rows)
+            door = rng.randrange(left, right, 2)
+            for j in range(left, right):
+                if j != door:
+                    grid[i][j] = WALL
+            stack.append((top, left, i, right))
+            stack.append((i + 1, left, bottom, right))
+        else:
+            j = rng.choice(cols)
+            door = rng.randrange(top, bottom, 2)
+            for i in range(top, bottom):
+                if i != door:
+                    grid[i][j] = WALL
+            stack.append((top, left, bottom, j))
+            stack.append((top, j + 1, bottom, right))
+    return grid
+
+
+def scattered(height, width, rng, density):
+    """
+    Returns grid rows of randomly placed walls, keeping clear a random
+    monotone path from the top left to the bottom right.
+    """
+    grid = [
+        bytearray(WALL if rng.random() < density else OPEN
+                  for _ in range(width))
+        for _ in range(height)
+    ]
+    i, j = 0, 0
+    grid[i][j] = OPEN
+    while (i, j) != (height - 1, width - 1):
+        if j == width - 1 or (i < height - 1 and rng.random() < 0.5):
+            i += 1
+        else:
+            j += 1
+        grid[i][j] = OPEN
+    return grid
+
+
+if __name__ == "__main__":
+    main()
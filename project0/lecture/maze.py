@@ -1,10 +1,16 @@
+import heapq
+import itertools
 import sys
+import time
+from array import array
+from collections import deque
 
 class Node():
-    def __init__(self, state, parent, action):
+    def __init__(self, state, parent, action, cost=0):
         self.state = state
         self.parent = parent
         self.action = action
+        self.cost = cost
 
 
 class StackFrontier():
@@ -39,6 +45,79 @@ class QueueFrontier(StackFrontier):
             self.frontier = self.frontier[1:]
             return node
 
+
+class IndexedStackFrontier():
+    """
+    Stack frontier backed by a deque, with a count of the states
+    it holds so that `contains_state` does not scan the frontier.
+    """
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self.discard(node.state)
+            return node
+
+    def discard(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
+
+class IndexedQueueFrontier(IndexedStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self.discard(node.state)
+            return node
+
+
+class PriorityFrontier(IndexedStackFrontier):
+    """
+    Frontier that removes the node with the lowest `priority(node)`,
+    oldest first among equal priorities.
+    """
+    def __init__(self, priority):
+        super().__init__()
+        self.frontier = []
+        self.priority = priority
+        self.counter = itertools.count()
+
+    def add(self, node):
+        heapq.heappush(
+            self.frontier, (self.priority(node), next(self.counter), node)
+        )
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self.discard(node.state)
+            return node
+
+
 class Maze():
 
     def __init__(self, filename):
@@ -116,29 +195,65 @@ class Maze():
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def heuristic(self, state):
+        """Returns the Manhattan distance from a state to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
 
-        # Keep track of number of states explored
+    def frontier(self, strategy):
+        """Returns an empty frontier for a search strategy."""
+        if strategy == "dfs":
+            return IndexedStackFrontier()
+        elif strategy == "bfs":
+            return IndexedQueueFrontier()
+        elif strategy == "greedy":
+            return PriorityFrontier(lambda node: self.heuristic(node.state))
+        elif strategy == "astar":
+            return PriorityFrontier(
+                lambda node: node.cost + self.heuristic(node.state)
+            )
+        raise ValueError(f"unknown strategy: {strategy}")
+
+
+    def solve(self, strategy="bfs"):
+        """
+        Finds a solution to maze, if one exists.
+
+        `strategy` is one of "dfs", "bfs", "greedy" (greedy best-first)
+        or "astar" (A* search), both of the last two guided by
+        Manhattan distance to the goal.
+        """
+
+        # Keep track of number of states explored and time taken
         self.num_explored = 0
+        self.solve_time = 0
+        started = time.perf_counter()
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
-        frontier = QueueFrontier()
+        frontier = self.frontier(strategy)
         frontier.add(start)
 
         # Initialize an empty explored set
         self.explored = set()
 
+        # Keep track of the cheapest known cost to reach states for A*
+        costs = {self.start: 0}
+
         # Keep looping until solution found
         while True:
 
             # If nothing left in frontier, then no path
             if frontier.empty():
+                self.solve_time = time.perf_counter() - started
                 raise Exception("no solution")
 
             # Choose a node from the frontier
             node = frontier.remove()
+
+            # Skip states A* already reached more cheaply
+            if node.state in self.explored:
+                continue
             self.num_explored += 1
 
             # If node is the goal, then we have a solution
@@ -152,6 +267,7 @@ class Maze():
                 actions.reverse()
                 cells.reverse()
                 self.solution = (actions, cells)
+                self.solve_time = time.perf_counter() - started
                 return
 
             # Mark node as explored
@@ -159,9 +275,17 @@ class Maze():
 
             # Add neighbors to frontier
             for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
+                if state in self.explored:
+                    continue
+                cost = node.cost + 1
+                if strategy == "astar":
+                    if state in costs and costs[state] <= cost:
+                        continue
+                    costs[state] = cost
+                elif frontier.contains_state(state):
+                    continue
+                child = Node(state=state, parent=node, action=action, cost=cost)
+                frontier.add(child)
 
 
     def output_image(self, filename, show_solution=True, show_explored=False):
@@ -215,15 +339,227 @@ class Maze():
         img.save(filename)
 
 
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
+class CellBitmap():
+    """
+    Set of cell indexes of a grid stored as one bit per cell,
+    which also answers `(row, col) in bitmap`.
+    """
+    def __init__(self, height, width):
+        self.width = width
+        self.bits = bytearray((height * width + 7) // 8)
+
+    def add(self, index):
+        self.bits[index >> 3] |= 1 << (index & 7)
+
+    def has(self, index):
+        return self.bits[index >> 3] >> (index & 7) & 1
+
+    def __contains__(self, cell):
+        return bool(self.has(cell[0] * self.width + cell[1]))
+
+    def __len__(self):
+        return sum(bin(byte).count("1") for byte in self.bits)
+
+
+class GridMaze(Maze):
+    """
+    Maze stored as a flat bytearray with one byte per cell,
+    solved over integer cell indexes instead of (row, col) tuples.
+
+    `walls` is a list of memoryview rows of the grid and `explored`
+    is a CellBitmap, so `print` and `output_image` work unchanged.
+    """
+
+    # Translates maze characters to 1 for walls and 0 for open cells
+    WALLS = bytes(0 if chr(byte) in " AB" else 1 for byte in range(256))
+
+    # Moves in the order of Maze.neighbors
+    ACTIONS = ["up", "down", "left", "right"]
+
+    def __init__(self, filename):
+
+        # Read file and set height and width of maze
+        with open(filename) as f:
+            contents = f.read()
+
+        # Validate start and goal
+        if contents.count("A") != 1:
+            raise Exception("maze must have exactly one start point")
+        if contents.count("B") != 1:
+            raise Exception("maze must have exactly one goal")
+
+        # Determine height and width of maze
+        contents = contents.splitlines()
+        self.height = len(contents)
+        self.width = max(len(line) for line in contents)
+
+        # Keep track of walls, one byte per cell
+        self.grid = bytearray(self.height * self.width)
+        for i, line in enumerate(contents):
+            row = line.encode("ascii", "replace").translate(self.WALLS)
+            self.grid[i * self.width:i * self.width + len(row)] = row
+            if "A" in line:
+                self.start = (i, line.index("A"))
+            if "B" in line:
+                self.goal = (i, line.index("B"))
+
+        rows = memoryview(self.grid)
+        self.walls = [rows[i * self.width:(i + 1) * self.width]
+                      for i in range(self.height)]
+        self.solution = None
+
+
+    def index(self, cell):
+        """Returns the index of a (row, col) cell in the grid."""
+        return cell[0] * self.width + cell[1]
+
+
+    def heuristic(self, index):
+        """Returns the Manhattan distance from a cell index to the goal."""
+        row, col = divmod(index, self.width)
+        return abs(row - self.goal[0]) + abs(col - self.goal[1])
+
+
+    def solve(self, strategy="bfs"):
+        """
+        Finds a solution to maze, if one exists, using the same
+        strategies as Maze.solve.
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy: {strategy}")
 
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+        # Keep track of number of states explored and time taken
+        self.num_explored = 0
+        self.solve_time = 0
+        started = time.perf_counter()
+
+        grid, width, size = self.grid, self.width, len(self.grid)
+        start, goal = self.index(self.start), self.index(self.goal)
+
+        # Move that reached every discovered cell, which also
+        # gives its parent by stepping back
+        moves = bytearray(size)
+        back = [width, -width, 1, -1]
+
+        # Cells explored, and cells explored or in the frontier
+        self.explored = explored = CellBitmap(self.height, width)
+        discovered = CellBitmap(self.height, width)
+        discovered.add(start)
+
+        # Frontier of cell indexes, or of packed (priority, order, index)
+        # keys for the best-first strategies
+        informed = strategy in ["greedy", "astar"]
+        costs = array("i", [-1]) * size if strategy == "astar" else None
+        if costs is not None:
+            costs[start] = 0
+        frontier = deque([start])
+        order = 0
+        if informed:
+            frontier = [self.heuristic(start) << 64 | start]
+
+        while frontier:
+
+            # Choose a cell from the frontier
+            if strategy == "dfs":
+                index = frontier.pop()
+            elif strategy == "bfs":
+                index = frontier.popleft()
+            else:
+                index = heapq.heappop(frontier) & 0xFFFFFFFF
+
+                # Skip cells A* already reached more cheaply
+                if explored.has(index):
+                    continue
+            self.num_explored += 1
+
+            # If cell is the goal, then we have a solution
+            if index == goal:
+                actions = []
+                cells = []
+                while index != start:
+                    actions.append(self.ACTIONS[moves[index]])
+                    cells.append(divmod(index, width))
+                    index += back[moves[index]]
+                actions.reverse()
+                cells.reverse()
+                self.solution = (actions, cells)
+                self.solve_time = time.perf_counter() - started
+                return
+
+            # Mark cell as explored
+            explored.add(index)
+
+            # Add open neighbors to frontier by index arithmetic
+            col = index % width
+            for move, neighbor in (
+                (0, index - width if index >= width else -1),
+                (1, index + width if index + width < size else -1),
+                (2, index - 1 if col > 0 else -1),
+                (3, index + 1 if col < width - 1 else -1)
+            ):
+                if neighbor < 0 or grid[neighbor] or explored.has(neighbor):
+                    continue
+                if costs is not None:
+                    cost = costs[index] + 1
+                    if 0 <= costs[neighbor] <= cost:
+                        continue
+                    costs[neighbor] = cost
+                elif discovered.has(neighbor):
+                    continue
+                discovered.add(neighbor)
+                moves[neighbor] = move
+                if informed:
+                    priority = self.heuristic(neighbor)
+                    if costs is not None:
+                        priority += cost
+                    order += 1
+                    heapq.heappush(
+                        frontier, priority << 64 | order << 32 | neighbor
+                    )
+                else:
+                    frontier.append(neighbor)
+
+        # If nothing left in frontier, then no path
+        self.solve_time = time.perf_counter() - started
+        raise Exception("no solution")
+
+
+STRATEGIES = ["dfs", "bfs", "greedy", "astar"]
+
+
+def main():
+    # Use the compact grid representation with a trailing --grid flag
+    args = sys.argv[1:]
+    grid = "--grid" in args
+    if grid:
+        args.remove("--grid")
+    if len(args) not in [1, 2] or (
+        len(args) == 2 and args[1] not in STRATEGIES + ["all"]
+    ):
+        sys.exit("Usage: python maze.py maze.txt "
+                 "[dfs|bfs|greedy|astar|all] [--grid]")
+    strategy = args[1] if len(args) == 2 else "bfs"
+
+    m = GridMaze(args[0]) if grid else Maze(args[0])
+    print("Maze:")
+    m.print()
+
+    # Compare every strategy on the same maze
+    if strategy == "all":
+        for strategy in STRATEGIES:
+            m.solve(strategy)
+            print(f"{strategy}: {m.num_explored} states explored, "
+                  f"{len(m.solution[0])} steps, {m.solve_time * 1000:.3f} ms")
+        return
+
+    print("Solving...")
+    m.solve(strategy)
+    print("States Explored:", m.num_explored)
+    print(f"Time: {m.solve_time * 1000:.3f} ms")
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Bitboard representation of m,n,k game boards.
+
+A position is a pair of masks (x, o), one per player, where bit
+`cols * i + j` is set if the player has a mark on cell (i, j).
+"""
+
+from functools import lru_cache
+
+# Boards with at most this many cells look wins and symmetries up
+# in tables with one entry per mask
+TABLE_CELLS = 12
+
+
+@lru_cache(maxsize=None)
+def geometry(rows, cols, k):
+    """
+    Returns the shared Geometry of a `rows` x `cols` board where
+    `k` marks in a row win.
+    """
+    return Geometry(rows, cols, k)
+
+
+class Geometry():
+    """
+    Masks of the cells and winning lines of a `rows` x `cols` board
+    where `k` marks in a row win.
+    """
+
+    def __init__(self, rows, cols, k):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.cells = rows * cols
+
+        # Mask with every cell set
+        self.full = (1 << self.cells) - 1
+
+        # Lines through each cell, so that a move only checks its own
+        self.lines = line_masks(rows, cols, k)
+        self.through = [[line for line in self.lines if line >> cell & 1]
+                        for cell in range(self.cells)]
+
+        # Cells next to each cell and closeness to the middle of the
+        # board, for move ordering
+        self.around = [0] * self.cells
+        self.centrality = [-abs(2 * i - rows + 1) - abs(2 * j - cols + 1)
+                           for i in range(rows) for j in range(cols)]
+        for i in range(rows):
+            for j in range(cols):
+                for r in range(max(0, i - 1), min(rows, i + 2)):
+                    for c in range(max(0, j - 1), min(cols, j + 2)):
+                        if (r, c) != (i, j):
+                            self.around[i * cols + j] |= self.bit(r, c)
+
+        self.permutations = symmetries(rows, cols)
+        self.wins = None
+        self.transforms = None
+        if self.cells <= TABLE_CELLS:
+            # wins[mask] is True if the mask covers a whole line
+            self.wins = [any(mask & line == line for line in self.lines)
+                         for mask in range(self.full + 1)]
+            # transforms[s][mask] is the mask moved by the s-th symmetry
+            self.transforms = [
+                [self.permute(mask, permutation)
+                 for mask in range(self.full + 1)]
+                for permutation in self.permutations
+            ]
+
+    def bit(self, i, j):
+        """
+        Returns the mask of cell (i, j).
+        """
+        return 1 << (i * self.cols + j)
+
+    def from_board(self, board):
+        """
+        Returns the (x, o) masks of a list-of-lists board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == "X":
+                    x |= self.bit(i, j)
+                elif cell == "O":
+                    o |= self.bit(i, j)
+        return x, o
+
+    def won(self, mask):
+        """
+        Returns True if the mask covers a whole line.
+        """
+        if self.wins is not None:
+            return self.wins[mask]
+        for line in self.lines:
+            if mask & line == line:
+                return True
+        return False
+
+    def completes(self, mask, move):
+        """
+        Returns True if the mask covers a whole line through `move`,
+        which is faster than `won` when only `move` can have won.
+        """
+        for line in self.through[move.bit_length() - 1]:
+            if mask & line == line:
+                return True
+        return False
+
+    def utility(self, x, o):
+        """
+        Returns 1 if X has a line, -1 if O has one, 0 otherwise.
+        """
+        if self.won(x):
+            return 1
+        elif self.won(o):
+            return -1
+        return 0
+
+    def winner(self, x, o):
+        """
+        Returns "X" or "O" if that player has a line, otherwise None.
+        """
+        if self.won(x):
+            return "X"
+        elif self.won(o):
+            return "O"
+        return None
+
+    def moves(self, x, o):
+        """
+        Returns the masks of every empty cell.
+        """
+        empty = self.full & ~(x | o)
+        result = []
+        while empty:
+            move = empty & -empty
+            result.append(move)
+            empty ^= move
+        return result
+
+    def action(self, move):
+        """
+        Returns the (i, j) cell of a move mask.
+        """
+        return divmod(move.bit_length() - 1, self.cols)
+
+    def permute(self, mask, permutation):
+        """
+        Returns a mask moved by one of the `symmetries` permutations.
+        """
+        moved = 0
+        for cell, source in enumerate(permutation):
+            if mask >> source & 1:
+                moved |= 1 << cell
+        return moved
+
+    def canonical(self, x, o):
+        """
+        Returns a key shared by a position and all its rotations and
+        reflections: the smallest of their packed (x, o) masks.
+        """
+        if self.transforms is not None:
+            return min(transform[x] << self.cells | transform[o]
+                       for transform in self.transforms)
+        return min(self.permute(x, permutation) << self.cells
+                   | self.permute(o, permutation)
+                   for permutation in self.permutations)
+
+
+def x_to_move(x, o):
+    """
+    Returns True if X has the next turn.
+    """
+    return x.bit_count() <= o.bit_count()
+
+
+def play(x, o, move):
+    """
+    Returns the (x, o) masks after the player to move takes `move`.
+    """
+    if x_to_move(x, o):
+        return x | move, o
+    return x, o | move
+
+
+def line_masks(rows, cols, k):
+    """
+    Returns the masks of every `k` cells in a row, column or diagonal.
+    """
+    lines = []
+    for i in range(rows):
+        for j in range(cols):
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                r, c = i + (k - 1) * di, j + (k - 1) * dj
+                if 0 <= r < rows and 0 <= c < cols:
+                    lines.append(sum(1 << ((i + n * di) * cols + j + n * dj)
+                                     for n in range(k)))
+    return lines
+
+
+def symmetries(rows, cols):
+    """
+    Returns the rotations and reflections of a `rows` x `cols` board,
+    8 for square boards and 4 otherwise, each as a tuple giving
+    for every cell the cell it is moved from.
+    """
+    transforms = [
+        lambda i, j: (i, j),
+        lambda i, j: (rows - 1 - i, cols - 1 - j),
+        lambda i, j: (i, cols - 1 - j),
+        lambda i, j: (rows - 1 - i, j)
+    ]
+    if rows == cols:
+        size = rows
+        transforms += [
+            lambda i, j: (j, size - 1 - i),
+            lambda i, j: (size - 1 - j, i),
+            lambda i, j: (j, i),
+            lambda i, j: (size - 1 - j, size - 1 - i)
+        ]
+    permutations = []
+    for transform in transforms:
+        permutation = [0] * (rows * cols)
+        for i in range(rows):
+            for j in range(cols):
+                r, c = transform(i, j)
+                permutation[r * cols + c] = i * cols + j
+        permutations.append(tuple(permutation))
+    return permutations
@@ -0,0 +1,124 @@
+"""
+Builds and verifies the tic-tac-toe opening book.
+
+    python book.py build [path]
+    python book.py verify [path]
+"""
+
+import argparse
+import os
+import sys
+from array import array
+
+import bitboard
+import tictactoe as ttt
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build or verify the perfect-play opening book "
+                    "of every reachable tic-tac-toe position."
+    )
+    parser.add_argument("command", choices=["build", "verify"])
+    parser.add_argument("path", nargs="?", default=ttt.BOOK_NAME)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        entries = build()
+        save(entries, args.path)
+        print(f"Stored {sum(1 for entry in entries if entry)} positions "
+              f"in {args.path} ({os.path.getsize(args.path)} bytes)")
+    else:
+        ttt.load_book(args.path)
+        errors = verify()
+        for board, expected, found in errors:
+            print(f"Mismatch on {board}: search {expected}, book {found}")
+        if errors:
+            sys.exit(1)
+        print("Book matches minimax on every position")
+
+
+def positions():
+    """
+    Returns every board reachable from the initial state, including
+    finished ones.
+    """
+    game = bitboard.geometry(3, 3, 3)
+    seen = set()
+    boards = []
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        key = game.from_board(board)
+        if key in seen:
+            continue
+        seen.add(key)
+        boards.append(board)
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                stack.append(ttt.result(board, action))
+    return boards
+
+
+def build():
+    """
+    Returns the book entries of every reachable position
+    that is not over.
+    """
+    game = bitboard.geometry(3, 3, 3)
+    entries = array("H", [0]) * 3 ** 9
+    for board in positions():
+        if ttt.terminal(board):
+            continue
+        actions, value = ttt.optimal_actions(board)
+        mask = 0
+        for i, j in actions:
+            mask |= game.bit(i, j)
+        entries[ttt.book_index(*game.from_board(board))] = (
+            mask | (value + 2) << ttt.BOOK_VALUE
+        )
+    return entries
+
+
+def save(entries, path):
+    """
+    Writes book entries to `path`, little-endian.
+    """
+    if sys.byteorder == "big":
+        entries = array("H", entries)
+        entries.byteswap()
+    with open(path, "wb") as f:
+        f.write(ttt.BOOK_MAGIC)
+        entries.tofile(f)
+
+
+def verify():
+    """
+    Compares the loaded book with a live search of every reachable
+    position. Returns the (board, search, book) optimal actions and
+    values of every position where they differ, including finished
+    positions that have an entry, and (None, positions, entries) if
+    the book has entries for positions that cannot be reached.
+    """
+    errors = []
+    searched = 0
+    for board in positions():
+        found = ttt.book_entry(board)
+        if ttt.terminal(board):
+            if found is not None:
+                errors.append((board, None, found))
+            continue
+
+        searched += 1
+        actions, value = ttt.optimal_actions(board)
+        expected = (sorted(actions), value)
+        if found is None or (sorted(found[0]), found[1]) != expected:
+            errors.append((board, expected, found))
+
+    stored = sum(1 for entry in ttt.book if entry)
+    if stored != searched:
+        errors.append((None, searched, stored))
+    return errors
+
+if __name__ == "__main__":
+    main()
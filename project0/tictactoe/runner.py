@@ -1,9 +1,41 @@
+import os
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
+# Board size and win length: python runner.py [rows cols k]
+rows, cols, k = 3, 3, 3
+if len(sys.argv) == 4:
+    rows, cols, k = (int(arg) for arg in sys.argv[1:])
+
+# Milliseconds the AI searches boards larger than 3 x 3 for
+budget = 1000
+search = ttt.Search(rows, cols, k, order=ttt.nearby if rows * cols > 25 else None)
+
+# Look 3 x 3 boards up in the opening book if one was built
+if (rows, cols, k) == (3, 3, 3) and os.path.exists(ttt.BOOK_NAME):
+    ttt.load_book()
+
+# The AI thinks on its own thread so that the window keeps drawing
+executor = ThreadPoolExecutor(max_workers=1)
+
+
+def think(board):
+    """
+    Returns the AI move, taking at least half a second.
+    """
+    start = time.perf_counter()
+    if rows * cols <= 9:
+        move = ttt.minimax(board, k)
+    else:
+        move, _, _ = search.deepen(board, budget)
+    time.sleep(max(0, 0.5 - (time.perf_counter() - start)))
+    return move
+
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -15,11 +47,15 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Fit the board under the title
+tile_size = min(80, (height - 100) // rows, (width - 40) // cols)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = ttt.initial_state(rows, cols)
+ai_move = None
+clock = pygame.time.Clock()
 
 while True:
 
@@ -33,7 +69,8 @@ while True:
     if user is None:
 
         # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
+        title = largeFont.render("Play Tic-Tac-Toe" if (rows, cols, k) == (3, 3, 3)
+                                 else f"Play {rows}x{cols}, {k} in a row", True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 50)
         screen.blit(title, titleRect)
@@ -67,19 +104,18 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
                     tile_size, tile_size
                 )
-                pygame.draw.rect(screen, white, rect, 3)
+                pygame.draw.rect(screen, white, rect, 3 if tile_size > 40 else 1)
 
                 if board[i][j] != ttt.EMPTY:
                     move = moveFont.render(board[i][j], True, white)
@@ -89,12 +125,12 @@ while True:
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
+        game_over = ttt.terminal(board, k)
         player = ttt.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = ttt.winner(board, k)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -110,20 +146,18 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = executor.submit(think, board)
+            elif ai_move.done():
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -140,7 +174,8 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = ttt.initial_state(rows, cols)
+                    ai_move = None
 
     pygame.display.flip()
+    clock.tick(60)
@@ -0,0 +1,96 @@
+from collections import Counter
+from time import perf_counter
+
+
+class Stats():
+    """
+    Counts of the searches behind AI moves: nodes visited and cutoffs
+    per depth, children searched by expanded nodes, and the time and
+    nodes of every move.
+
+    Searches are counted by wrapping their functions with `counting`
+    and `timing`, so searches that are not wrapped cost nothing extra.
+    """
+
+    def __init__(self):
+        self.nodes = Counter()
+        self.cutoffs = Counter()
+        self.expanded = 0
+        self.children = 0
+        self.times = []
+        self.moveNodes = []
+
+        # Children searched so far by every node on the current path
+        self.path = []
+
+    def counting(self, function, moves):
+        """
+        Returns a version of a recursive search function that records
+        its nodes, where `moves`, called with the same arguments,
+        returns the number of moves of a node. Nodes that stop before
+        searching all of them count as cutoffs, and nodes that search
+        none as leaves.
+        """
+        path = self.path
+
+        def counted(*args, **kwargs):
+            depth = len(path)
+            self.nodes[depth] += 1
+            if path:
+                path[-1] += 1
+            path.append(0)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                children = path.pop()
+                if children:
+                    self.expanded += 1
+                    self.children += children
+                    if children < moves(*args, **kwargs):
+                        self.cutoffs[depth] += 1
+
+        return counted
+
+    def timing(self, function):
+        """
+        Returns a version of a function choosing a move that records
+        the time it took and the nodes it searched.
+        """
+        def timed(*args, **kwargs):
+            nodes = self.total()
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.times.append(perf_counter() - start)
+                self.moveNodes.append(self.total() - nodes)
+
+        return timed
+
+    def total(self):
+        """
+        Returns the number of nodes visited.
+        """
+        return sum(self.nodes.values())
+
+    def branching_factor(self):
+        """
+        Returns the average number of children searched by nodes that
+        searched any, which pruning lowers.
+        """
+        return self.children / self.expanded if self.expanded else 0.0
+
+    def as_dict(self):
+        """
+        Returns the stats as a dict that can be dumped as JSON.
+        """
+        moves = len(self.times)
+        return {
+            "nodes": self.total(),
+            "nodes_per_depth": dict(sorted(self.nodes.items())),
+            "cutoffs_per_depth": dict(sorted(self.cutoffs.items())),
+            "branching_factor": self.branching_factor(),
+            "moves": moves,
+            "nodes_per_move": sum(self.moveNodes) / moves if moves else 0.0,
+            "seconds_per_move": sum(self.times) / moves if moves else 0.0
+        }
@@ -3,21 +3,111 @@ Tic Tac Toe Player
 """
 
 import math
-from copy import deepcopy
-import operator
-from random import shuffle
+import sys
+from array import array
+from collections import OrderedDict
+from random import choice
+from time import perf_counter
+
+import bitboard
+from stats import Stats
 
 X = "X"
 O = "O"
 EMPTY = None
 
-def initial_state():
+# Kinds of values stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable():
+    """
+    Bounded cache of search values keyed on canonical boards.
+    When full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the (value, kind) entry stored for a key, or None.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value, kind):
+        """
+        Stores a value for a key, evicting the oldest entry if full.
+        """
+        self.entries[key] = (value, kind)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        """
+        Returns the share of lookups that found an entry.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Transposition table shared by all searches of 3 x 3 boards
+table = TranspositionTable()
+
+# Transposition tables of other games, by geometry
+tables = {bitboard.geometry(3, 3, 3): table}
+
+# Stats of the searches while enable_stats is on, and the functions
+# it replaced with counting versions
+stats = None
+plain = {}
+
+# Value of a win in depth-limited searches, above any evaluation
+WIN = 1 << 62
+
+# Opening book of every 3 x 3 position: an array of 3 ** 9 entries
+# indexed by book_index, each holding the mask of the optimal moves
+# and, from bit BOOK_VALUE, the minmax value plus 2. Empty entries
+# are positions that cannot be reached or are over.
+BOOK_NAME = "tictactoe.book"
+BOOK_MAGIC = b"TTTBOOK1"
+BOOK_VALUE = 9
+book = None
+
+# TERNARY[mask] reads the cells of a 3 x 3 mask as a base 3 number
+TERNARY = [sum(3 ** cell for cell in range(9) if mask >> cell & 1)
+           for mask in range(1 << 9)]
+
+
+def initial_state(rows=3, cols=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * cols for _ in range(rows)]
+
+
+def geometry(board, k=3):
+    """
+    Returns the bitboard geometry of a board where `k` in a row wins.
+    """
+    return bitboard.geometry(len(board), len(board[0]), k)
 
 
 def player(board):
@@ -44,9 +134,9 @@ def actions(board):
     """
     # Fill set
     actions = set()
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == EMPTY:
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == EMPTY:
                 actions.add((i, j))
     
     # Return set
@@ -60,8 +150,8 @@ def result(board, action):
     if action not in actions(board):
         raise Exception("Invalid action")
     
-    # Deep copy
-    boardCopy = deepcopy(board)
+    # Copy rows
+    boardCopy = [row.copy() for row in board]
 
     # Make a move
     i = action[0]
@@ -71,55 +161,28 @@ def result(board, action):
     return boardCopy
 
 
-def winner(board):
+def winner(board, k=3):
     """
     Returns the winner of the game, if there is one.
     """
-    Xcount = set()
-    Ocount = set()
-    # Check rows
-    for row in board:
-        Xcount.add(row.count("X"))
-        Ocount.add(row.count("O"))
-
-    # Check columns
-    boardFlipped = [[col[i] for col in board] for i in range(3)]
-    for row in boardFlipped:
-        Xcount.add(row.count("X"))
-        Ocount.add(row.count("O"))
-    
-    # Check diagonals
-    diagonalLR = [board[i][i] for i in range(3)]
-    Xcount.add(diagonalLR.count("X"))
-    Ocount.add(diagonalLR.count("O"))
-    
-    diagonalRL = [board[i][2 - i] for i in range(3)]
-    Xcount.add(diagonalRL.count("X"))
-    Ocount.add(diagonalRL.count("O"))
-
-    # Get winner
-    if 3 in Xcount:
-        return "X"
-    elif 3 in Ocount:
-        return "O"
-    else:
-        return None
+    game = geometry(board, k)
+    return game.winner(*game.from_board(board))
 
 
-def terminal(board):
+def terminal(board, k=3):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) != None or len(actions(board)) == 0:
+    if winner(board, k) != None or len(actions(board)) == 0:
         return True
     return False
 
 
-def utility(board):
+def utility(board, k=3):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    w = winner(board)
+    w = winner(board, k)
     if w == "X":
         return 1
     elif w == "O":
@@ -127,9 +190,57 @@ def utility(board):
     return 0
 
 
-def minimax(board):
+def canonical(board):
+    """
+    Returns a key shared by a board and all its rotations and
+    reflections.
+    """
+    game = geometry(board)
+    return game.canonical(*game.from_board(board))
+
+
+def table_for(game):
+    """
+    Returns the transposition table of a geometry.
+    """
+    if game not in tables:
+        tables[game] = TranspositionTable()
+    return tables[game]
+
+
+def cached(table, key, alpha, beta):
+    """
+    Returns the value stored for a key in a table if it is exact
+    or already outside the (alpha, beta) window, or None.
+    """
+    entry = table.get(key)
+    if entry is None:
+        return None
+    value, kind = entry
+    if (kind == EXACT or (kind == LOWER and value >= beta)
+            or (kind == UPPER and value <= alpha)):
+        return value
+    return None
+
+
+def store(table, key, value, alpha, beta):
+    """
+    Stores a value searched with the (alpha, beta) window in a table,
+    recording whether it is exact or only a bound.
+    """
+    if value <= alpha:
+        table.put(key, value, UPPER)
+    elif value >= beta:
+        table.put(key, value, LOWER)
+    else:
+        table.put(key, value, EXACT)
+
+
+def minimax(board, k=3):
     """
     Returns the optimal action for the current player on the board.
+    Searches to the end of the game, so larger boards should use
+    a depth-limited Search instead.
     """
 
     """
@@ -145,83 +256,435 @@ def minimax(board):
                 return action with min value
     """
     # Return None if terminal board
-    if terminal(board):
+    if terminal(board, k):
         return None
 
+    # Look the board up in the opening book if one is loaded
+    entry = book_entry(board, k)
+    if entry is not None:
+        return choice(entry[0])
+
+    # Choose random action with max or min value
+    return choice(optimal_actions(board, k)[0])
+
+
+def optimal_actions(board, k=3):
+    """
+    Returns every action with the best minmax value for the current
+    player on a board that is not terminal, and that value.
+    """
     # Initialize list that contains minmax values for every action in tuples
     minmaxes = []
 
+    # Search on bitboards
+    game = geometry(board, k)
+    x, o = game.from_board(board)
+
     # If player is "X"
     if player(board) == "X":
         # Fill minmaxes list
-        for action in actions(board):
-            minmaxes.append((action, minValue(result(board, action), -3, 3, 0)))
-        """
-        Choose random action with max value.
-        How to get a tuple element with max/min second value in a list: 
-        https://stackoverflow.com/questions/13039192/max-second-element-in-tuples-python
-        """
-        shuffle(minmaxes)
-        optimalAction = max(minmaxes, key=operator.itemgetter(1))[0]
-        
+        for move in game.moves(x, o):
+            minmaxes.append((game.action(move), minValueBits(
+                game, x | move, o, -math.inf, math.inf, 0)))
+        # Find max value
+        value = max(minmax for _, minmax in minmaxes)
+
     # If player is "O"
     else:
         # Fill minmaxes list
-        for action in actions(board):
-            minmaxes.append((action, maxValue(result(board, action), -3, 3, 0)))
-        # Choose random action with min value
-        shuffle(minmaxes)
-        optimalAction = min(minmaxes, key=operator.itemgetter(1))[0]
-    
-    # Return optimal action
-    return optimalAction
+        for move in game.moves(x, o):
+            minmaxes.append((game.action(move), maxValueBits(
+                game, x, o | move, -math.inf, math.inf, 0)))
+        # Find min value
+        value = min(minmax for _, minmax in minmaxes)
+
+    return [action for action, minmax in minmaxes if minmax == value], value
+
+
+def book_index(x, o):
+    """
+    Returns the book entry of a 3 x 3 position: its cells read as a
+    base 3 number, with 0 for empty, 1 for X and 2 for O.
+    """
+    return TERNARY[x] + 2 * TERNARY[o]
 
 
-def maxValue(board, alpha, beta, level):
+def book_entry(board, k=3):
+    """
+    Returns the optimal actions and value stored for a board in the
+    loaded opening book, or None.
+    """
+    if book is None or (len(board), len(board[0]), k) != (3, 3, 3):
+        return None
+    entry = book[book_index(*geometry(board).from_board(board))]
+    if not entry:
+        return None
+    return ([divmod(cell, 3) for cell in range(9) if entry >> cell & 1],
+            (entry >> BOOK_VALUE) - 2)
+
+
+def load_book(path=BOOK_NAME):
+    """
+    Loads an opening book written by book.py, so that minimax
+    looks 3 x 3 boards up instead of searching them.
+    """
+    global book
+    with open(path, "rb") as f:
+        if f.read(len(BOOK_MAGIC)) != BOOK_MAGIC:
+            raise ValueError("not an opening book")
+        entries = array("H")
+        entries.fromfile(f, 3 ** 9)
+    if sys.byteorder == "big":
+        entries.byteswap()
+    book = entries
+
+
+def maxValue(board, alpha, beta, level, k=3):
     """
     Returns max value of a board.
     'level' keeps track of how deep the function is in the tree 
     to prioritize one turn win moves.
     """
+    game = geometry(board, k)
+    return maxValueBits(game, *game.from_board(board), alpha, beta, level)
+
+
+def minValue(board, alpha, beta, level, k=3):
+    """
+    Returns min value of a board.
+    'level' keeps track of how deep the function is in the tree 
+    to prioritize one turn win moves.
+    """
+    game = geometry(board, k)
+    return minValueBits(game, *game.from_board(board), alpha, beta, level)
+
+
+def maxValueBits(game, x, o, alpha, beta, level):
+    """
+    Returns max value of the bitboard position (x, o) of a geometry,
+    as maxValue.
+    """
     # Update level
     level += 1
     # Return utility if terminal board or 'utility * 2' if it is a one turn win move
-    if terminal(board):
-        util = utility(board)
+    moves = game.moves(x, o)
+    if game.won(x) or game.won(o) or not moves:
+        util = game.utility(x, o)
         if level == 1:
             return util * 2
         return util
+    # Reuse the value of this board or any of its symmetries
+    table = table_for(game)
+    key = game.canonical(x, o)
+    value = cached(table, key, alpha, beta)
+    if value is not None:
+        return value
+    start = alpha
     # Initialize starting value (-infinity)
-    value = -3
+    value = -math.inf
     # Loop through actions and find max value
-    for action in actions(board):
-        value = max(value, minValue(result(board, action), alpha, beta, level))
+    for move in moves:
+        value = max(value, minValueBits(game, *bitboard.play(x, o, move),
+                                        alpha, beta, level))
         alpha = max(alpha, value)
         if alpha >= beta or value == 1:
-            return value
+            break
+    store(table, key, value, start, beta)
     return value
 
 
-def minValue(board, alpha, beta, level):
+def minValueBits(game, x, o, alpha, beta, level):
     """
-    Returns min value of a board.
-    'level' keeps track of how deep the function is in the tree 
-    to prioritize one turn win moves.
+    Returns min value of the bitboard position (x, o) of a geometry,
+    as minValue.
     """
     # Update level
     level += 1
     # Return utility if terminal board or 'utility * 2' if it is a one turn win move
-    if terminal(board):
-        util = utility(board)
+    moves = game.moves(x, o)
+    if game.won(x) or game.won(o) or not moves:
+        util = game.utility(x, o)
         if level == 1:
             return util * 2
         return util
+    # Reuse the value of this board or any of its symmetries
+    table = table_for(game)
+    key = game.canonical(x, o)
+    value = cached(table, key, alpha, beta)
+    if value is not None:
+        return value
+    start = beta
     # Initialize starting value (infinity)
-    value = 3
+    value = math.inf
     # Loop through actions and find min value
-    for action in actions(board):
-        value = min(value, maxValue(result(board, action), alpha, beta, level))
-        beta = max(beta, value)
+    for move in moves:
+        value = min(value, maxValueBits(game, *bitboard.play(x, o, move),
+                                        alpha, beta, level))
+        beta = min(beta, value)
         if beta <= alpha or value == -1:
-            return value
-    return value
\ No newline at end of file
+            break
+    store(table, key, value, alpha, start)
+    return value
+
+
+# Nodes searched between checks of a search deadline
+CHECK_EVERY = 128
+
+
+class Timeout(Exception):
+    """
+    Raised inside a search that runs past its deadline.
+    """
+
+
+def enable_stats(search=None):
+    """
+    Starts collecting Stats of minimax, and of a Search if given, and
+    returns them. Swaps in counting versions of the search functions,
+    so searches cost nothing extra while stats are disabled; callers
+    must look minimax up on this module rather than import it.
+    """
+    global stats, minimax, optimal_actions, maxValueBits, minValueBits
+    disable_stats()
+    stats = Stats()
+    plain.update(minimax=minimax, optimal_actions=optimal_actions,
+                 maxValueBits=maxValueBits, minValueBits=minValueBits)
+
+    def empties(game, x, o, alpha, beta, level):
+        return (game.full & ~(x | o)).bit_count()
+
+    minimax = stats.timing(minimax)
+    optimal_actions = stats.counting(
+        optimal_actions, lambda board, k=3: len(actions(board))
+    )
+    maxValueBits = stats.counting(maxValueBits, empties)
+    minValueBits = stats.counting(minValueBits, empties)
+    if search is not None:
+        search.count(stats)
+    return stats
+
+
+def disable_stats(search=None):
+    """
+    Stops collecting stats, restoring the plain search functions.
+    """
+    global stats
+    globals().update(plain)
+    plain.clear()
+    stats = None
+    if search is not None:
+        search.count(None)
+
+
+class Search():
+    """
+    Depth-limited alpha-beta search of an m,n,k game, for boards
+    too large to search to the end of the game.
+
+    `evaluate(geometry, x, o)` scores a position that is not over
+    from X's point of view. `order(geometry, x, o, moves)` returns
+    the moves to search, best first, and may leave some out.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3, evaluate=None, order=None):
+        self.geometry = bitboard.geometry(rows, cols, k)
+        self.evaluate = lines_score if evaluate is None else evaluate
+        self.order = nearby_first if order is None else order
+        self.nodes = 0
+        self.deadline = None
+
+    def best(self, board, depth):
+        """
+        Returns the best action for the current player found searching
+        `depth` moves ahead, and its value. Wins are worth more than
+        any evaluation, and more the sooner they come.
+        Returns (None, value) on terminal boards.
+        """
+        game = self.geometry
+        x, o = game.from_board(board)
+        if game.won(x) or game.won(o) or (x | o) == game.full:
+            return None, WIN * game.utility(x, o)
+        move, value = self.root(x, o, depth)
+        return game.action(move), value
+
+    def deepen(self, board, budget, limit=None):
+        """
+        Returns the best action for the current player, its value and
+        the depth searched, searching one move deeper at a time until
+        `budget` milliseconds have passed, `limit` moves ahead have
+        been searched or the game is decided. The action comes from
+        the deepest search that finished, and a search one move ahead
+        always finishes. Returns (None, value, 0) on terminal boards.
+        """
+        game = self.geometry
+        x, o = game.from_board(board)
+        if game.won(x) or game.won(o) or (x | o) == game.full:
+            return None, WIN * game.utility(x, o), 0
+
+        empty = (game.full & ~(x | o)).bit_count()
+        limit = empty if limit is None else min(limit, empty)
+        deadline = perf_counter() + budget / 1000
+        move, value = self.root(x, o, 1)
+        depth = 1
+        try:
+            self.deadline = deadline
+            while depth < limit and abs(value) < WIN and perf_counter() < deadline:
+                # Search the best move so far first for earlier cutoffs
+                move, value = self.root(x, o, depth + 1, first=move)
+                depth += 1
+        except Timeout:
+            pass
+        finally:
+            self.deadline = None
+        return game.action(move), value, depth
+
+    def root(self, x, o, depth, first=None):
+        """
+        Returns the best move and its value searching `depth` moves
+        ahead from a position that is not over, trying `first` first.
+        """
+        game = self.geometry
+        moves = self.order(game, x, o, game.moves(x, o))
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+
+        xTurn = bitboard.x_to_move(x, o)
+        alpha, beta = -math.inf, math.inf
+        bestMove, bestValue = None, None
+        for move in moves:
+            if xTurn:
+                value = self.minValue(x | move, o, move, alpha, beta, depth - 1)
+                if bestValue is None or value > bestValue:
+                    bestMove, bestValue = move, value
+                alpha = max(alpha, value)
+            else:
+                value = self.maxValue(x, o | move, move, alpha, beta, depth - 1)
+                if bestValue is None or value < bestValue:
+                    bestMove, bestValue = move, value
+                beta = min(beta, value)
+        return bestMove, bestValue
+
+    def count(self, stats):
+        """
+        Records the nodes and moves of this search in a Stats,
+        or stops recording them if `stats` is None.
+        """
+        for name in ("best", "deepen", "root", "maxValue", "minValue"):
+            self.__dict__.pop(name, None)
+        if stats is None:
+            return
+
+        def ordered(x, o, *args, **kwargs):
+            return len(self.order(self.geometry, x, o,
+                                  self.geometry.moves(x, o)))
+
+        self.best = stats.timing(self.best)
+        self.deepen = stats.timing(self.deepen)
+        self.root = stats.counting(self.root, ordered)
+        self.maxValue = stats.counting(self.maxValue, ordered)
+        self.minValue = stats.counting(self.minValue, ordered)
+
+    def tick(self):
+        """
+        Counts a node, raising Timeout past the deadline.
+        """
+        self.nodes += 1
+        if (self.deadline is not None and not self.nodes % CHECK_EVERY
+                and perf_counter() > self.deadline):
+            raise Timeout
+
+    def maxValue(self, x, o, last, alpha, beta, depth):
+        """
+        Returns the value of a position with X to move, where O just
+        played `last`, searching `depth` more moves.
+        """
+        self.tick()
+        game = self.geometry
+        # Return the value of a finished or evaluated board
+        if game.completes(o, last):
+            return -WIN - depth
+        if (x | o) == game.full:
+            return 0
+        if depth <= 0:
+            return self.evaluate(game, x, o)
+        # Loop through ordered moves and find max value
+        value = -math.inf
+        for move in self.order(game, x, o, game.moves(x, o)):
+            value = max(value, self.minValue(x | move, o, move,
+                                             alpha, beta, depth - 1))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        return value
+
+    def minValue(self, x, o, last, alpha, beta, depth):
+        """
+        Returns the value of a position with O to move, where X just
+        played `last`, searching `depth` more moves.
+        """
+        self.tick()
+        game = self.geometry
+        # Return the value of a finished or evaluated board
+        if game.completes(x, last):
+            return WIN + depth
+        if (x | o) == game.full:
+            return 0
+        if depth <= 0:
+            return self.evaluate(game, x, o)
+        # Loop through ordered moves and find min value
+        value = math.inf
+        for move in self.order(game, x, o, game.moves(x, o)):
+            value = min(value, self.maxValue(x, o | move, move,
+                                             alpha, beta, depth - 1))
+            beta = min(beta, value)
+            if beta <= alpha:
+                break
+        return value
+
+
+def lines_score(geometry, x, o):
+    """
+    Scores a position for X: every line that only one player has
+    marks on counts 10 to the power of their marks, for X or against.
+    """
+    score = 0
+    for line in geometry.lines:
+        xs = x & line
+        os = o & line
+        if xs and not os:
+            score += 10 ** xs.bit_count()
+        elif os and not xs:
+            score -= 10 ** os.bit_count()
+    return score
+
+
+def nearby_first(geometry, x, o, moves):
+    """
+    Orders moves by how many marks they touch, then by how many
+    lines go through them, then by how close they are to the middle.
+    """
+    taken = x | o
+    around = geometry.around
+    through = geometry.through
+    centrality = geometry.centrality
+
+    def key(move):
+        cell = move.bit_length() - 1
+        return ((around[cell] & taken).bit_count(), len(through[cell]),
+                centrality[cell])
+
+    return sorted(moves, key=key, reverse=True)
+
+
+def nearby(geometry, x, o, moves):
+    """
+    Orders moves as nearby_first, leaving out moves that touch no mark.
+    Cuts the branching factor of large boards such as 15 x 15 gomoku.
+    """
+    taken = x | o
+    around = geometry.around
+    ordered = nearby_first(geometry, x, o, moves)
+    touching = [move for move in ordered
+                if around[move.bit_length() - 1] & taken]
+    return touching or ordered[:1]
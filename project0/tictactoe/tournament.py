@@ -0,0 +1,120 @@
+"""
+Plays AI games without a window and reports how fast and how well
+the AI plays, as a benchmark for changes to its search.
+
+    python tournament.py --games 1000 --opponent random
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import tictactoe as ttt
+
+OPPONENTS = ["ai", "random"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play AI-vs-AI or AI-vs-random games across a pool "
+                    "of processes and report throughput and results."
+    )
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--opponent", choices=OPPONENTS, default="ai")
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("-k", type=int, default=3,
+                        help="marks in a row that win")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="search depth on boards larger than 3 x 3")
+    parser.add_argument("--book", help="opening book to look 3 x 3 boards up in")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    games = [(args.seed + n, args.opponent, n % 2 == 0, args.rows, args.cols,
+              args.k, args.depth, args.book) for n in range(args.games)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(play, games, chunksize=max(1, len(games) // 64)))
+    elapsed = time.perf_counter() - start
+
+    for line in report(results, args.opponent, elapsed):
+        print(line)
+
+
+def play(game):
+    """
+    Plays one game and returns a dict of its winner, whether the AI
+    (or the first AI) played X, and the Stats of the AI's searches.
+    """
+    seed, opponent, aiX, rows, cols, k, depth, book = game
+    random.seed(seed)
+    rng = random.Random(seed)
+    if book is not None and ttt.book is None:
+        ttt.load_book(book)
+    search = None
+    if rows * cols > 9:
+        search = ttt.Search(rows, cols, k,
+                            order=ttt.nearby if rows * cols > 25 else None)
+
+    # Every game starts with empty transposition tables so that
+    # games are comparable
+    for table in ttt.tables.values():
+        table.clear()
+
+    stats = ttt.enable_stats(search)
+    board = ttt.initial_state(rows, cols)
+    while not ttt.terminal(board, k):
+        aiTurn = opponent == "ai" or (ttt.player(board) == ttt.X) == aiX
+        if not aiTurn:
+            board = ttt.result(board, rng.choice(sorted(ttt.actions(board))))
+            continue
+
+        if search is None:
+            action = ttt.minimax(board, k)
+        else:
+            action, _ = search.best(board, depth)
+        board = ttt.result(board, action)
+
+    ttt.disable_stats(search)
+    return {"winner": ttt.winner(board, k), "aiX": aiX, "stats": stats}
+
+
+def report(results, opponent, elapsed):
+    """
+    Returns the lines of a summary of game results.
+    """
+    games = len(results)
+    moves = sum(len(result["stats"].times) for result in results)
+    nodes = sum(result["stats"].total() for result in results)
+    seconds = sum(sum(result["stats"].times) for result in results)
+    expanded = sum(result["stats"].expanded for result in results)
+    children = sum(result["stats"].children for result in results)
+    cutoffs = sum(sum(result["stats"].cutoffs.values()) for result in results)
+    xWins = sum(1 for result in results if result["winner"] == ttt.X)
+    oWins = sum(1 for result in results if result["winner"] == ttt.O)
+    draws = games - xWins - oWins
+
+    lines = [
+        f"Games: {games} in {elapsed:.2f}s ({games / elapsed:.1f} games/s)",
+        f"X wins: {xWins}, O wins: {oWins}, draws: {draws}",
+    ]
+    if opponent == "random":
+        wins = sum(1 for result in results if result["winner"] is not None
+                   and (result["winner"] == ttt.X) == result["aiX"])
+        losses = sum(1 for result in results if result["winner"] is not None
+                     and (result["winner"] == ttt.X) != result["aiX"])
+        lines.append(f"AI wins: {wins}, losses: {losses}, draws: {draws}")
+    if moves:
+        lines.append(f"AI moves: {moves}, {nodes / moves:.1f} nodes/move, "
+                     f"{1000 * seconds / moves:.3f} ms/move")
+    if expanded:
+        lines.append(f"Branching factor: {children / expanded:.2f}, "
+                     f"cutoffs: {cutoffs} of {expanded} expanded nodes")
+    return lines
+
+
+if __name__ == "__main__":
+    main()
@@ -21,10 +21,11 @@ symbols = characters + rooms + weapons
 
 
 def check_knowledge(knowledge):
+    entailed, refuted = backbone(knowledge, symbols)
     for symbol in symbols:
-        if model_check(knowledge, symbol):
+        if symbol in entailed:
             termcolor.cprint(f"{symbol}: YES", "green")
-        elif not model_check(knowledge, Not(symbol)):
+        elif symbol not in refuted:
             print(f"{symbol}: MAYBE")
 
 
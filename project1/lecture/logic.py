@@ -1,19 +1,83 @@
 import itertools
+import math
+import multiprocessing
+import weakref
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Sentences that cannot change, one for every distinct structure,
+# held by weak references so that unused ones are freed
+interned = dict()
+
+
+def forget(reference):
+    """Drops the entry of an interned sentence that was freed."""
+    if interned.get(reference.key) is reference:
+        del interned[reference.key]
 
 
 class Sentence():
+    __slots__ = ("_frozen", "_hash", "_symbols", "__weakref__")
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave symbols
+        out, returning None if the value depends on them.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """Returns a frozenset of all symbols in the logical sentence."""
+        if not self._frozen:
+            return self.collect_symbols()
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", self.collect_symbols())
+        return self._symbols
+
+    def collect_symbols(self):
+        """Returns a new frozenset of all symbols in the logical sentence."""
+        return frozenset()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences cannot be changed")
+
+    @classmethod
+    def intern(cls, key, frozen, *fields):
+        """
+        Returns a sentence of the class with the given field values.
+        If none of its operands can change, which `frozen` tells, the
+        sentence is interned under `key`: built once with a cached hash,
+        and shared by every equal sentence.
+        """
+        reference = interned.get(key)
+        if reference is not None:
+            sentence = reference()
+            if sentence is not None:
+                return sentence
+
+        sentence = object.__new__(cls)
+        assign = object.__setattr__
+        for name, value in zip(cls.__slots__, fields):
+            assign(sentence, name, value)
+        assign(sentence, "_frozen", False)
+        assign(sentence, "_symbols", None)
+        if frozen:
+            assign(sentence, "_hash", hash(sentence))
+            assign(sentence, "_frozen", True)
+            interned[key] = weakref.KeyedRef(sentence, forget, key)
+        return sentence
 
     @classmethod
     def validate(cls, sentence):
@@ -43,14 +107,22 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls.intern((cls, name), True, name)
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
+        if self._frozen:
+            return self._hash
         return hash(("symbol", self.name))
 
     def __repr__(self):
@@ -62,22 +134,36 @@ class Symbol(Sentence):
         except KeyError:
             raise EvaluationException(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def collect_symbols(self):
+        return frozenset([self.name])
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        return cls.intern((cls, operand), operand._frozen, operand)
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and not (self._frozen and other._frozen)
+            and self.operand == other.operand
+        )
 
     def __hash__(self):
+        if self._frozen:
+            return self._hash
         return hash(("not", hash(self.operand)))
 
     def __repr__(self):
@@ -86,18 +172,29 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def collect_symbols(self):
+        return self.operand.symbol_set()
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
+    # Conjunctions can grow with add, so they are never interned
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        object.__setattr__(self, "conjuncts", list(conjuncts))
+        object.__setattr__(self, "_frozen", False)
+
+    def __reduce__(self):
+        return (And, tuple(self.conjuncts))
 
     def __eq__(self, other):
         return isinstance(other, And) and self.conjuncts == other.conjuncts
@@ -120,26 +217,52 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def collect_symbols(self):
+        return frozenset().union(
+            *[conjunct.symbol_set() for conjunct in self.conjuncts]
+        )
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        return cls.intern(
+            (cls,) + disjuncts,
+            all(disjunct._frozen for disjunct in disjuncts),
+            disjuncts
+        )
+
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and not (self._frozen and other._frozen)
+            and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
+        if self._frozen:
+            return self._hash
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
         )
@@ -151,29 +274,52 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def collect_symbols(self):
+        return frozenset().union(
+            *[disjunct.symbol_set() for disjunct in self.disjuncts]
+        )
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.intern((cls, antecedent, consequent),
+                          antecedent._frozen and consequent._frozen,
+                          antecedent, consequent)
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and not (self._frozen and other._frozen)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
+        if self._frozen:
+            return self._hash
         return hash(("implies", hash(self.antecedent), hash(self.consequent)))
 
     def __repr__(self):
@@ -183,28 +329,49 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def collect_symbols(self):
+        return self.antecedent.symbol_set() | self.consequent.symbol_set()
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.intern((cls, left, right), left._frozen and right._frozen,
+                          left, right)
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and not (self._frozen and other._frozen)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
+        if self._frozen:
+            return self._hash
         return hash(("biconditional", hash(self.left), hash(self.right)))
 
     def __repr__(self):
@@ -216,48 +383,683 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def collect_symbols(self):
+        return self.left.symbol_set() | self.right.symbol_set()
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def model_check(knowledge, query, stats=None, workers=None):
+    """
+    Checks if knowledge base entails query.
+    If stats is a dict, counts in it the "models" checked in full and
+    the branches "pruned" because knowledge already fails or "decided"
+    because knowledge holds and query is already known.
+    If workers is given, checks slices of the models in that many
+    processes, as model_check_parallel does.
+    """
+    if workers is not None:
+        return model_check_parallel(knowledge, query, workers, stats)
+    counts = {"models": 0, "pruned": 0, "decided": 0}
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
+        # Give up once a parallel check has found a counter-model
+        if stopped is not None:
+            tick()
+
         # If model has an assignment for each symbol
-        if not symbols:
+        if len(model) == len(symbols):
+            counts["models"] += 1
 
             # If knowledge base is true in model, then query must also be true
             if knowledge.evaluate(model):
                 return query.evaluate(model)
             return True
+
+        # Stop early once the partial model decides the answer
+        known = knowledge.evaluate_partial(model)
+        if known is False:
+            counts["pruned"] += 1
+            return True
+        if known is True:
+            entailed = query.evaluate_partial(model)
+            if entailed is not None:
+                counts["decided"] += 1
+                return entailed
+
+        # Choose the next unused symbol
+        p = symbols[len(model)]
+
+        # Ensure entailment holds with the symbol true and false
+        try:
+            model[p] = True
+            if not check_all(knowledge, query, symbols, model):
+                return False
+            model[p] = False
+            return check_all(knowledge, query, symbols, model)
+        finally:
+            del model[p]
+
+    # Check that knowledge entails query
+    symbols = check_order(knowledge, query)
+    result = check_all(knowledge, query, symbols, dict())
+    if stats is not None:
+        stats.update(counts)
+    return result
+
+
+def check_order(knowledge, query):
+    """
+    Returns the names of all symbols in both knowledge and query,
+    the most used first so that partial models decide sooner.
+    """
+    frequency = occurrences(knowledge) + occurrences(query)
+    return sorted(set.union(knowledge.symbols(), query.symbols()),
+                  key=lambda symbol: (-frequency[symbol], symbol))
+
+
+# Slices of the models model_check_parallel gives each worker, so that
+# workers that finish early take more
+SLICES_PER_WORKER = 8
+
+# Models a worker checks between looking at the stop flag
+CHECK_EVERY = 1024
+
+# In a worker, the event set once any slice has a counter-model
+stopped = None
+ticks = 0
+
+
+class Stopped(Exception):
+    """Raised in a worker to abandon its slice."""
+
+
+def model_check_parallel(knowledge, query, workers=None, stats=None):
+    """
+    Checks if knowledge base entails query, as model_check does, in a
+    pool of worker processes, workers of them (default: one per CPU).
+    The first symbols model_check would assign are fixed to each
+    combination of values, and every slice of the models this gives
+    is checked on its own. As soon as a slice has a model where
+    knowledge holds and query does not, the other slices stop.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    symbols = check_order(knowledge, query)
+    fixed = min(len(symbols),
+                math.ceil(math.log2(workers * SLICES_PER_WORKER)))
+    slices = [
+        [Symbol(name) if value else Not(Symbol(name))
+         for name, value in zip(symbols, values)]
+        for values in itertools.product((True, False), repeat=fixed)
+    ]
+
+    stop = multiprocessing.Event()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=start_worker,
+                               initargs=(stop,))
+    result = True
+    try:
+        pending = {pool.submit(check_slice, knowledge, query, literals)
+                   for literals in slices}
+        while pending and result:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entailed, counts = future.result()
+                if stats is not None:
+                    for key, count in counts.items():
+                        stats[key] = stats.get(key, 0) + count
+                if entailed is False:
+                    result = False
+        stop.set()
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return result
+
+
+def start_worker(stop):
+    """Keeps the stop flag of model_check_parallel in a worker process."""
+    global stopped
+    stopped = stop
+
+
+def tick():
+    """Raises Stopped every CHECK_EVERY calls once the stop flag is set."""
+    global ticks
+    ticks += 1
+    if ticks % CHECK_EVERY == 0 and stopped.is_set():
+        raise Stopped
+
+
+def check_slice(knowledge, query, literals):
+    """
+    Checks if knowledge base entails query in the models where every
+    literal holds, returning the answer, or None if stopped early,
+    and the stats of model_check.
+    """
+    # The literals prune every other slice right away, and only
+    # make their symbols more used, so the order of symbols is kept
+    counts = dict()
+    if stopped is not None and stopped.is_set():
+        return None, counts
+    try:
+        return model_check(And(*literals, knowledge), query, counts), counts
+    except Stopped:
+        return None, counts
+
+
+def occurrences(sentence):
+    """Returns a Counter of the times each symbol appears in the sentence."""
+    counts = Counter()
+    stack = [sentence]
+    while stack:
+        sentence = stack.pop()
+        if isinstance(sentence, Symbol):
+            counts[sentence.name] += 1
+        elif isinstance(sentence, Not):
+            stack.append(sentence.operand)
+        elif isinstance(sentence, And):
+            stack.extend(sentence.conjuncts)
+        elif isinstance(sentence, Or):
+            stack.extend(sentence.disjuncts)
+        elif isinstance(sentence, Implication):
+            stack += [sentence.antecedent, sentence.consequent]
+        elif isinstance(sentence, Biconditional):
+            stack += [sentence.left, sentence.right]
+    return counts
+
+
+def backbone(knowledge, symbols=None):
+    """
+    Returns the sets of symbols, out of symbols (default: every symbol
+    in knowledge), that knowledge base entails are true and that it
+    entails are false, as model_check would for each symbol and its
+    negation, from one sweep over the models of knowledge.
+    """
+    if symbols is None:
+        symbols = [Symbol(name) for name in knowledge.symbols()]
+    names = {symbol.name for symbol in symbols}
+
+    # Symbols not yet seen true or false in a model of knowledge
+    true = set(names)
+    false = set(names)
+    satisfiable = False
+
+    def sweep(model):
+        """Drops the candidates flipped in models that extend model."""
+        nonlocal satisfiable
+
+        # Stop once no symbol is left to learn about
+        if satisfiable and not true and not false:
+            return
+
+        # Every way to extend a model where knowledge holds is a model too,
+        # so only the symbols it assigns can stay candidates
+        known = knowledge.evaluate_partial(model)
+        if known is False:
+            return
+        if known is True:
+            satisfiable = True
+            true.difference_update(
+                [name for name in true if model.get(name) is not True])
+            false.difference_update(
+                [name for name in false if model.get(name) is not False])
+            return
+
+        # Choose the next unused symbol
+        p = order[len(model)]
+        try:
+            model[p] = True
+            sweep(model)
+            model[p] = False
+            sweep(model)
+        finally:
+            del model[p]
+
+    order = check_order(knowledge, And(*symbols))
+    sweep(dict())
+
+    # Knowledge with no models entails everything
+    if not satisfiable:
+        return set(symbols), set(symbols)
+    return ({symbol for symbol in symbols if symbol.name in true},
+            {symbol for symbol in symbols if symbol.name in false})
+
+
+class CNF():
+    """
+    Clauses of sentences in conjunctive normal form, built with the
+    Tseitin transformation: every compound subsentence gets a new
+    variable equivalent to it, so the clauses grow linearly with the
+    sentences. Variables are ints from 1 and literals are nonzero
+    ints, -v being the negation of v.
+    """
+
+    def __init__(self):
+        self.variables = dict()
+        self.count = 0
+        self.clauses = []
+        self.literals = dict()
+        self.true = None
+
+    def variable(self, name):
+        """Returns the variable of a symbol name, creating it if new."""
+        if name not in self.variables:
+            self.count += 1
+            self.variables[name] = self.count
+        return self.variables[name]
+
+    def new(self):
+        """Returns a new variable that stands for no symbol."""
+        self.count += 1
+        return self.count
+
+    def add(self, sentence):
+        """Adds clauses that hold exactly when the sentence holds."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
         else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to the sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, And):
+            if not sentence.conjuncts:
+                return self.constant()
+            operands = [self.literal(conjunct)
+                        for conjunct in sentence.conjuncts]
+            v = self.new()
+            for operand in operands:
+                self.clauses.append([-v, operand])
+            self.clauses.append([v] + [-operand for operand in operands])
+        elif isinstance(sentence, Or):
+            if not sentence.disjuncts:
+                return -self.constant()
+            operands = [self.literal(disjunct)
+                        for disjunct in sentence.disjuncts]
+            v = self.new()
+            for operand in operands:
+                self.clauses.append([v, -operand])
+            self.clauses.append([-v] + operands)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            v = self.new()
+            self.clauses += [[-v, -a, b], [v, a], [v, -b]]
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.new()
+            self.clauses += [[-v, -a, b], [-v, a, -b], [v, a, b], [v, -a, -b]]
+        else:
+            raise TypeError("must be a logical sentence")
+        self.literals[sentence] = v
+        return v
+
+    def constant(self):
+        """Returns a variable that is always true."""
+        if self.true is None:
+            self.true = self.new()
+            self.clauses.append([self.true])
+        return self.true
+
+
+class Solver():
+    """
+    DPLL SAT solver with unit propagation over two watched literals
+    per clause, taking clauses of ints as built by CNF. Clauses can
+    be added between calls to solve.
+    """
+
+    def __init__(self, count=0, clauses=()):
+        self.values = [0] * (count + 1)
+        self.occurrences = [0] * (count + 1)
+        self.watches = dict()
+        self.trail = []
+        self.head = 0
+        self.levels = []
+        self.conflicted = False
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def grow(self, count):
+        """Makes room for variables up to count."""
+        if count >= len(self.values):
+            extra = count + 1 - len(self.values)
+            self.values += [0] * extra
+            self.occurrences += [0] * extra
+
+    def value(self, literal):
+        """Returns 1 if a literal is true, -1 if false, 0 if unassigned."""
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, literals):
+        """Adds a clause, which the current assignments simplify."""
+        unique = dict.fromkeys(literals)
+        if any(-literal in unique for literal in unique):
+            return
+        self.grow(max(map(abs, unique), default=0))
+
+        # Only unconditional assignments remain between calls to solve
+        values = self.values
+        clause = []
+        for literal in unique:
+            self.occurrences[abs(literal)] += 1
+            value = values[abs(literal)]
+            if (value if literal > 0 else -value) == 1:
+                return
+            if not value:
+                clause.append(literal)
+        if not clause:
+            self.conflicted = True
+        elif len(clause) == 1:
+            self.assign(clause[0])
+            if self.propagate():
+                self.conflicted = True
+        else:
+            self.watches.setdefault(clause[0], []).append(clause)
+            self.watches.setdefault(clause[1], []).append(clause)
+
+    def assign(self, literal):
+        """Makes a literal true."""
+        self.values[abs(literal)] = 1 if literal > 0 else -1
+        self.trail.append(literal)
+
+    def undo(self, position):
+        """Unassigns every literal assigned from a trail position on."""
+        for literal in self.trail[position:]:
+            self.values[abs(literal)] = 0
+        del self.trail[position:]
+        self.head = position
+
+    def propagate(self):
+        """Assigns the literals of unit clauses, returning True on a conflict."""
+        values = self.values
+        watches = self.watches
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = watches.get(false)
+            if not watching:
+                continue
+
+            i = 0
+            while i < len(watching):
+                clause = watching[i]
+                # Keep the false literal second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                value = values[abs(first)]
+                if (value if first > 0 else -value) == 1:
+                    i += 1
+                    continue
+
+                # Watch another literal that is not false if there is one
+                for n in range(2, len(clause)):
+                    literal = clause[n]
+                    value = values[abs(literal)]
+                    if (value if literal > 0 else -value) != -1:
+                        clause[1], clause[n] = literal, false
+                        watches.setdefault(literal, []).append(clause)
+                        watching[i] = watching[-1]
+                        watching.pop()
+                        break
+                else:
+                    # Otherwise the clause is unit or in conflict
+                    value = values[abs(first)]
+                    if (value if first > 0 else -value) == -1:
+                        return True
+                    self.assign(first)
+                    i += 1
+        return False
+
+    def solve(self, assumptions=()):
+        """
+        Returns a satisfying assignment as a list of values indexed by
+        variable, 1 for true and -1 for false, or None if the clauses
+        and assumed literals cannot all hold.
+        """
+        if self.conflicted:
+            return None
+        if self.propagate():
+            self.conflicted = True
+            return None
+
+        self.grow(max(map(abs, assumptions), default=0))
+        try:
+            # Assumptions are decisions that are never flipped
+            for literal in assumptions:
+                value = self.value(literal)
+                if value == -1:
+                    return None
+                if value == 0:
+                    self.levels.append((len(self.trail), literal, True))
+                    self.assign(literal)
+                    if self.propagate():
+                        return None
+
+            # Decide the variables in most clauses first
+            order = sorted(range(1, len(self.values)),
+                           key=lambda v: self.occurrences[v], reverse=True)
+            while True:
+                variable = next((v for v in order if not self.values[v]), None)
+                if variable is None:
+                    return list(self.values)
+                self.levels.append((len(self.trail), -variable, False))
+                self.assign(-variable)
+
+                while self.propagate():
+                    # Flip the latest decision that has not been flipped
+                    while self.levels and self.levels[-1][2]:
+                        self.undo(self.levels.pop()[0])
+                    if not self.levels:
+                        return None
+                    position, literal, _ = self.levels.pop()
+                    self.undo(position)
+                    self.levels.append((position, -literal, True))
+                    self.assign(-literal)
+        finally:
+            if self.levels:
+                self.undo(self.levels[0][0])
+                self.levels.clear()
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, as model_check does, by
+    showing that knowledge and the negated query cannot both hold.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return Solver(cnf.count, cnf.clauses).solve() is None
+
+
+class KnowledgeBase():
+    """
+    Knowledge compiled to clauses once, with one Solver that answers
+    every query. Every model found while answering is kept, so that
+    queries false in a known model are answered without solving.
+    """
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.added = 0
+        self.models = []
+        self.answers = dict()
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.cnf.add(sentence)
+        self.compile()
+
+        # More knowledge keeps entailed queries entailed, but may
+        # rule out the models that showed other queries were not
+        self.models.clear()
+        self.answers = {query: answer
+                        for query, answer in self.answers.items() if answer}
+
+    def compile(self):
+        """Passes new clauses to the solver."""
+        for clause in self.cnf.clauses[self.added:]:
+            self.solver.add_clause(clause)
+        self.added = len(self.cnf.clauses)
+
+    def ask(self, query):
+        """Checks if the knowledge base entails query."""
+        if query in self.answers:
+            return self.answers[query]
+        literal = self.cnf.literal(query)
+        self.compile()
+
+        # A model where the query is false shows it is not entailed
+        answer = not any(self.falsifies(model, literal)
+                         for model in self.models)
+        if answer:
+            model = self.solver.solve([-literal])
+            if model is not None:
+                self.models.append(model)
+                answer = False
+        self.answers[query] = answer
+        return answer
+
+    def entailed(self, queries):
+        """Returns the queries that the knowledge base entails."""
+        return [query for query in queries if self.ask(query)]
+
+    def backbone(self, symbols):
+        """
+        Returns the sets of symbols that the knowledge base entails are
+        true and that it entails are false, as backbone does.
+        """
+        return ({symbol for symbol in symbols if self.ask(symbol)},
+                {symbol for symbol in symbols if self.ask(Not(symbol))})
+
+    @staticmethod
+    def falsifies(model, literal):
+        """Checks if a literal is false in a model found by the solver."""
+        if abs(literal) >= len(model):
+            return False
+        value = model[abs(literal)]
+        return (value if literal > 0 else -value) == -1
+
+
+# Models model_check_bits evaluates at once are 2 ** LANES bits of ints
+LANES = 12
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Compiles a sentence into a function of a list of ints, one per
+    symbol name in symbols, and a mask of the bits in use. Bit m of
+    each int is the value of its symbol in model m, and bit m of the
+    int returned is the value of the sentence in model m. Shared
+    subsentences are evaluated once.
+    """
+    index = {name: i for i, name in enumerate(symbols)}
+    lines = []
+    names = dict()
+
+    def emit(sentence):
+        if isinstance(sentence, Symbol):
+            if sentence.name not in index:
+                raise Exception(f"variable {sentence.name} not in symbols")
+            return f"v[{index[sentence.name]}]"
+        if sentence in names:
+            return names[sentence]
+
+        if isinstance(sentence, Not):
+            expression = f"mask ^ {emit(sentence.operand)}"
+        elif isinstance(sentence, And):
+            operands = [emit(conjunct) for conjunct in sentence.conjuncts]
+            expression = " & ".join(operands) if operands else "mask"
+        elif isinstance(sentence, Or):
+            operands = [emit(disjunct) for disjunct in sentence.disjuncts]
+            expression = " | ".join(operands) if operands else "0"
+        elif isinstance(sentence, Implication):
+            antecedent = emit(sentence.antecedent)
+            consequent = emit(sentence.consequent)
+            expression = f"(mask ^ {antecedent}) | {consequent}"
+        elif isinstance(sentence, Biconditional):
+            left = emit(sentence.left)
+            right = emit(sentence.right)
+            expression = f"mask ^ ({left} ^ {right})"
+        else:
+            raise TypeError("must be a logical sentence")
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+        name = f"t{len(lines)}"
+        lines.append(f"    {name} = {expression}")
+        names[sentence] = name
+        return name
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+    result = emit(sentence)
+    source = "\n".join(["def compiled(v, mask):"] + lines
+                       + [f"    return {result}"])
+    namespace = dict()
+    exec(source, namespace)
+    return namespace["compiled"]
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+def model_check_bits(knowledge, query, lanes=LANES):
+    """
+    Checks if knowledge base entails query, as model_check does, with
+    compiled sentences evaluating 2 ** lanes models at once.
+    """
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    def pattern(i, lanes):
+        """Returns the bits of symbol i across every model of a block."""
+        period = 1 << (i + 1)
+        ones = ((1 << (1 << i)) - 1) << (1 << i)
+        return ones * (((1 << (1 << lanes)) - 1) // ((1 << period) - 1))
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    # Get all symbols in both knowledge and query
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge = compile_sentence(knowledge, symbols)
+    query = compile_sentence(query, symbols)
+
+    # The first symbols take every combination within a block of models,
+    # and the rest are the same across a block
+    lanes = min(lanes, len(symbols))
+    mask = (1 << (1 << lanes)) - 1
+    values = ([pattern(i, lanes) for i in range(lanes)]
+              + [0] * (len(symbols) - lanes))
+    for block in range(1 << (len(symbols) - lanes)):
+        for i in range(lanes, len(symbols)):
+            values[i] = mask if block >> (i - lanes) & 1 else 0
+
+        # A model where knowledge holds and query does not
+        if knowledge(values, mask) & ~query(values, mask):
+            return False
+    return True
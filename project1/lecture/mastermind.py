@@ -51,8 +51,9 @@ knowledge.add(And(
     Not(Symbol("yellow3"))
 ))
 
+entailed, _ = backbone(knowledge, symbols)
 for symbol in symbols:
-    if model_check(knowledge, symbol):
+    if symbol in entailed:
         print(symbol)
 
 print(knowledge.formula())
\ No newline at end of file
@@ -50,6 +50,7 @@ knowledge.add(
     Symbol("MinervaGryffindor")
 )
 
+entailed, _ = backbone(knowledge, symbols)
 for symbol in symbols:
-    if model_check(knowledge, symbol):
+    if symbol in entailed:
         print(symbol)
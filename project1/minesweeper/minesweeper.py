@@ -303,4 +303,147 @@ class MinesweeperAI():
         # Choose random move
         if len(moves):
             return random.choice(tuple(moves))
-        
\ No newline at end of file
+        
+
+class BitsetMinesweeperAI(MinesweeperAI):
+    """
+    Minesweeper game player that keeps its knowledge as bitmasks.
+    Cell (i, j) is bit `i * width + j` of a mask, and knowledge maps
+    the mask of the cells of each sentence to the number of them
+    which are mines. Known mines and safe cells are kept both as sets
+    of cells, like MinesweeperAI, and as masks.
+    """
+
+    def __init__(self, height=8, width=8):
+        super().__init__(height, width)
+
+        # Masks of cells known to be mines or safe
+        self.mineMask = 0
+        self.safeMask = 0
+
+        # Sentences as {mask: count}, and the masks of the sentences
+        # each cell is in, so that only sentences sharing a cell with
+        # a new one are compared with it
+        self.knowledge = dict()
+        self.containing = [set() for _ in range(height * width)]
+
+        # Sentences waiting to be reduced and compared with the rest
+        self.pending = []
+
+        # Mask of the cells around each cell
+        self.around = [0] * (height * width)
+        for i in range(height):
+            for j in range(width):
+                for r in range(max(0, i - 1), min(height, i + 2)):
+                    for c in range(max(0, j - 1), min(width, j + 2)):
+                        if (r, c) != (i, j):
+                            self.around[i * width + j] |= 1 << (r * width + c)
+
+    def bit(self, cell):
+        """
+        Returns the mask of a cell.
+        """
+        return 1 << (cell[0] * self.width + cell[1])
+
+    def mark_mine(self, cell):
+        """
+        Marks a cell as a mine, and updates all knowledge
+        to mark that cell as a mine as well.
+        """
+        self.learn(self.bit(cell), 0)
+        self.infer()
+
+    def mark_safe(self, cell):
+        """
+        Marks a cell as safe, and updates all knowledge
+        to mark that cell as safe as well.
+        """
+        self.learn(0, self.bit(cell))
+        self.infer()
+
+    def add_knowledge(self, cell, count):
+        """
+        Called when the Minesweeper board tells us, for a given
+        safe cell, how many neighboring cells have mines in them,
+        and draws the same conclusions as MinesweeperAI.
+        """
+        self.moves_made.add(cell)
+        self.learn(0, self.bit(cell))
+        self.pending.append((self.around[cell[0] * self.width + cell[1]], count))
+        self.infer()
+
+    def learn(self, mines, safes):
+        """
+        Marks masks of cells as mines and as safe, and sends every
+        sentence with one of those cells back to be reduced.
+        """
+        mines &= ~self.mineMask
+        safes &= ~self.safeMask
+        self.mineMask |= mines
+        self.safeMask |= safes
+        for index in bits(mines):
+            self.mines.add(divmod(index, self.width))
+        for index in bits(safes):
+            self.safes.add(divmod(index, self.width))
+
+        touched = set()
+        for index in bits(mines | safes):
+            touched |= self.containing[index]
+        for mask in touched:
+            self.pending.append((mask, self.forget(mask)))
+
+    def forget(self, mask):
+        """
+        Removes a sentence from knowledge and returns its count.
+        """
+        for index in bits(mask):
+            self.containing[index].discard(mask)
+        return self.knowledge.pop(mask)
+
+    def infer(self):
+        """
+        Adds pending sentences to knowledge until no new sentence,
+        mine or safe cell can be concluded.
+        """
+        while self.pending:
+            mask, count = self.pending.pop()
+
+            # Leave out cells already known
+            count -= (mask & self.mineMask).bit_count()
+            mask &= ~(self.mineMask | self.safeMask)
+            if not mask or mask in self.knowledge:
+                continue
+
+            # Check sentence for mines or safe cells
+            if count == 0:
+                self.learn(0, mask)
+                continue
+            if count == mask.bit_count():
+                self.learn(mask, 0)
+                continue
+
+            # Any time one sentence's cells are a subset of another's,
+            # the cells left over hold the difference of their counts
+            others = set()
+            for index in bits(mask):
+                others |= self.containing[index]
+            for other in others:
+                otherCount = self.knowledge[other]
+                if mask & ~other == 0:
+                    self.pending.append((other & ~mask, otherCount - count))
+                elif other & ~mask == 0:
+                    self.pending.append((mask & ~other, count - otherCount))
+
+            self.knowledge[mask] = count
+            for index in bits(mask):
+                self.containing[index].add(mask)
+
+
+def bits(mask):
+    """
+    Yields the index of every bit set in a mask.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low